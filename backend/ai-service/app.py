@@ -1,18 +1,39 @@
 # ===== ai-service/app.py =====
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
+import asyncio
+import json
 import logging
+import re
+import threading
 import time
 import sys
 from contextlib import asynccontextmanager
 
+from modules.complexity import MAX_SOURCE_CHARS, ComplexityAnalyzer
+from modules.embedding_batcher import EmbeddingBatcher
 from modules.embedding_generator import EmbeddingGenerator
+from modules.local_embedding import HashingEmbedder
 from modules.github_analysis import GitHubAnalyzer
+from modules.http_cache import credential_identity
+from modules.question_pool import QuestionPool, has_test_case
+from modules.rate_limiter import RateLimiter
+from modules.result_cache import AsyncResultCache
+from modules.role_resolver import RoleResolver
+from modules.role_matrix import RoleMatrix
+from modules.sandbox_pool import SandboxPool, SandboxWorkerError
+from modules.semantic_cache import SemanticResponseCache
+from modules.skill_graph import SkillGraph
+from modules.skill_taxonomy import SkillTaxonomy
+from modules.upstream_executor import UpstreamExecutor
+from modules.vector_index import VectorIndex
+from utils import batch_cosine_similarity, encode_embedding
 import numpy as np
+import base64
 import google.generativeai as genai
 from google.api_core.exceptions import ResourceExhausted
 import os
@@ -45,7 +66,16 @@ logger = logging.getLogger(__name__)
 
 # ===== GLOBAL STATE =====
 embedding_generator = None
+embedding_batcher = None
+vector_index = None
 github_analyzer = None
+github_result_cache = None
+skill_taxonomy = None
+skill_graph = None
+role_matrix = None
+role_resolver = None
+question_pool = None
+sandbox_pool = None
 request_count = 0
 error_count = 0
 start_time = time.time()
@@ -54,7 +84,7 @@ start_time = time.time()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application startup and shutdown"""
-    global embedding_generator, github_analyzer, start_time
+    global embedding_generator, embedding_batcher, vector_index, github_analyzer, github_result_cache, skill_taxonomy, skill_graph, role_matrix, role_resolver, question_pool, sandbox_pool, start_time
     
     # Startup
     try:
@@ -64,8 +94,91 @@ async def lifespan(app: FastAPI):
         # Initialize services
         embedding_generator = EmbeddingGenerator()
         embedding_generator.load_model()
+        # Coalesces concurrent /embed calls into one upstream request
+        embedding_batcher = EmbeddingBatcher(
+            embedding_generator,
+            window_ms=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")),
+            max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "100"))
+        )
+        
+        # User embeddings for nearest-neighbour matching (snapshot restored from disk)
+        vector_index = VectorIndex(
+            directory=os.getenv("VECTOR_INDEX_DIR", os.path.join("cache", "vector_index")),
+            ivf_threshold=int(os.getenv("VECTOR_INDEX_IVF_THRESHOLD", "50000")),
+            nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+        )
+        vector_index.start_snapshots(float(os.getenv("VECTOR_INDEX_SNAPSHOT_SECONDS", "300")))
         
-        github_analyzer = GitHubAnalyzer()
+        # Skill names + aliases compiled once into a single matcher
+        skill_taxonomy = SkillTaxonomy.load(os.getenv("SKILL_TAXONOMY_PATH") or None)
+        # Related-skill graph for /recommend, precomputed as a sparse transition matrix
+        skill_graph = SkillGraph.load(
+            os.getenv("SKILL_GRAPH_PATH") or None,
+            damping=float(os.getenv("SKILL_GRAPH_DAMPING", "0.5")),
+            steps=int(os.getenv("SKILL_GRAPH_STEPS", "3"))
+        )
+        # Role requirements as skill x role matrices for /analyze-trajectory/batch
+        role_matrix = RoleMatrix(ROLE_GALAXY, LEVEL_MAP, resolve=skill_taxonomy.resolve)
+        # target_role -> known role; local embeddings keep this offline and sub-millisecond
+        role_resolver = RoleResolver(
+            {role: ROLE_ALIASES.get(role, []) for role in ROLE_GALAXY},
+            embedding_generator.local_engine.embed,
+            default_role="Senior Full Stack Engineer",
+            min_confidence=float(os.getenv("ROLE_MATCH_MIN_CONFIDENCE", "0.35"))
+        )
+        
+        github_analyzer = GitHubAnalyzer(
+            max_workers=int(os.getenv("GITHUB_FETCH_CONCURRENCY", "8")),
+            pool_size=int(os.getenv("GITHUB_POOL_SIZE", "16")),
+            http_cache_dir=os.getenv("GITHUB_HTTP_CACHE_DIR", os.path.join("cache", "github_http")),
+            http_cache_memory_mb=int(os.getenv("GITHUB_HTTP_CACHE_MEMORY_MB", "16")),
+            http_cache_disk_mb=int(os.getenv("GITHUB_HTTP_CACHE_DISK_MB", "256")),
+            fetch_mode=os.getenv("GITHUB_FETCH_MODE", "rest"),
+            base_url=os.getenv("GITHUB_API_URL", "https://api.github.com"),
+            graphql_url=os.getenv("GITHUB_GRAPHQL_URL") or None,
+            state_dir=os.getenv("GITHUB_STATE_DIR", os.path.join("cache", "github_state")),
+            full_refresh_interval=float(os.getenv("GITHUB_FULL_REFRESH_SECONDS", "86400")),
+            taxonomy=skill_taxonomy,
+            language_mode=os.getenv("GITHUB_LANGUAGE_MODE", "primary"),
+            language_cache_dir=os.getenv("GITHUB_LANGUAGE_CACHE_DIR", os.path.join("cache", "github_languages"))
+        )
+        # Finished analyses per username: TTL + stale-while-revalidate + single-flight
+        github_result_cache = AsyncResultCache(
+            ttl=float(os.getenv("GITHUB_RESULT_TTL_SECONDS", "600")),
+            stale_ttl=float(os.getenv("GITHUB_RESULT_STALE_SECONDS", "3600"))
+        )
+        
+        # Interview questions are generated ahead of demand, within their own Gemini budget
+        question_pool = QuestionPool(
+            _generate_pool_question,
+            directory=os.getenv("QUESTION_POOL_DIR", os.path.join("cache", "question_pool")) or None,
+            rate_limiter=RateLimiter(
+                requests_per_minute=float(os.getenv("QUESTION_POOL_RPM", "2")),
+                state_path=os.getenv("QUESTION_POOL_RATE_LIMIT_FILE", os.path.join("cache", "rate_limits", "gemini_questions.bucket"))
+            ),
+            executor=persona.executor,
+            available=persona.llm_available,
+            target_depth=int(os.getenv("QUESTION_POOL_DEPTH", "5")),
+            topics=[t.strip() for t in os.getenv("QUESTION_POOL_TOPICS", "dsa").split(",") if t.strip()]
+        )
+        question_pool.start()
+        interview_manager.pool = question_pool
+        
+        # Warm, resource-limited interpreters that run submissions against their test case
+        sandbox_pool = SandboxPool(
+            size=int(os.getenv("SANDBOX_WORKERS", "2")),
+            max_jobs_per_worker=int(os.getenv("SANDBOX_MAX_JOBS_PER_WORKER", "100")),
+            cpu_seconds=float(os.getenv("SANDBOX_CPU_SECONDS", "2")),
+            memory_mb=int(os.getenv("SANDBOX_MEMORY_MB", "256")),
+            wall_seconds=float(os.getenv("SANDBOX_WALL_SECONDS", "5")),
+            acquire_timeout=float(os.getenv("SANDBOX_ACQUIRE_TIMEOUT_SECONDS", "10"))
+        )
+        try:
+            await sandbox_pool.start()
+        except (SandboxWorkerError, OSError) as e:
+            # No fork/pwd/resource (Windows) or a broken install: evaluation falls back to static analysis
+            logger.error(f"Sandbox unavailable, submissions will not be executed: {e}")
+            sandbox_pool = None
         
         logger.info("AI service started successfully")
         yield
@@ -77,6 +190,20 @@ async def lifespan(app: FastAPI):
         # Shutdown
         logger.info("Shutting down AI service...")
         # Cleanup resources if needed
+        if vector_index is not None:
+            await vector_index.stop()
+        if embedding_generator is not None:
+            embedding_generator.cache.flush()
+            embedding_generator.executor.shutdown()
+        if question_pool is not None:
+            await question_pool.stop()
+        if sandbox_pool is not None:
+            sandbox_pool.shutdown()
+        persona.executor.shutdown()
+        interview_manager.analyzer.executor.shutdown()
+        if github_analyzer is not None:
+            github_analyzer.executor.shutdown()
+            github_analyzer.fetch_pool.shutdown(wait=False, cancel_futures=True)
 
 # ===== FASTAPI APP INITIALIZATION =====
 app = FastAPI(
@@ -100,8 +227,30 @@ app.add_middleware(
     max_age=3600
 )
 
-# GZIP Compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# GZIP Compression - except for streamed responses, which must reach the client as they are produced
+STREAMING_PATHS = frozenset({"/interview/chat/stream", "/analyze_github/batch"})
+
+
+class StreamingAwareGZipMiddleware:
+    """
+    GZipMiddleware for everything but STREAMING_PATHS. Whether GZip leaves
+    text/event-stream alone and flushes each streamed chunk depends on the
+    Starlette release, so the streaming routes bypass it explicitly.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, exclude_paths=frozenset()):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=1000, exclude_paths=STREAMING_PATHS)
 
 # Request logging middleware
 @app.middleware("http")
@@ -137,6 +286,14 @@ async def log_requests(request: Request, call_next):
 
 class SkillEmbeddingRequest(BaseModel):
     skills: List[str] = Field(..., min_items=1, max_items=100)
+    # Wire format: "list" (JSON floats) or "base64" (packed bytes in JSON).
+    # Send "Accept: application/octet-stream" to get the raw bytes instead.
+    encoding: str = Field(default="list", pattern="^(list|base64)$")
+    dtype: str = Field(default="float32", pattern="^(float32|float16|int8)$")
+    # "joined": embed all skills as one string. "composed": embed each skill once
+    # (cached atom) and pool them, optionally weighted by proficiency/gravity.
+    mode: str = Field(default="joined", pattern="^(joined|composed)$")
+    skill_weights: Optional[Dict[str, float]] = None
     
     @field_validator('skills')
     @classmethod
@@ -157,7 +314,10 @@ class SkillEmbeddingRequest(BaseModel):
         return sanitized
 
 class SkillEmbeddingResponse(BaseModel):
-    embedding: List[float]
+    embedding: Optional[List[float]] = None
+    embedding_b64: Optional[str] = None  # little-endian `dtype` values, base64
+    dtype: str = "float32"
+    scale: Optional[float] = None  # int8 only: value = int8 * scale
     dimension: int
     processing_time: float
 
@@ -180,6 +340,75 @@ class SimilarityResponse(BaseModel):
     method: str
     processing_time: float
 
+class BatchSimilarityRequest(BaseModel):
+    query: List[str] = Field(..., min_items=1, max_items=100)
+    candidates: List[List[str]] = Field(..., min_items=1, max_items=500)
+    top_k: Optional[int] = Field(default=None, ge=1, le=500)
+    
+    @field_validator('query')
+    @classmethod
+    def validate_query(cls, v):
+        sanitized = [s.strip()[:100] for s in v if isinstance(s, str) and s.strip()]
+        if not sanitized:
+            raise ValueError('No valid query skills provided')
+        return sanitized
+    
+    @field_validator('candidates')
+    @classmethod
+    def validate_candidates(cls, v):
+        sanitized = []
+        for i, skills in enumerate(v):
+            cleaned = [s.strip()[:100] for s in skills[:100] if isinstance(s, str) and s.strip()]
+            if not cleaned:
+                raise ValueError(f'Candidate {i} has no valid skills')
+            sanitized.append(cleaned)
+        return sanitized
+
+class RankedCandidate(BaseModel):
+    index: int
+    similarity: float
+
+class BatchSimilarityResponse(BaseModel):
+    scores: List[float]  # one score per candidate, in request order
+    ranking: List[RankedCandidate]  # best first, top_k entries
+    method: str
+    processing_time: float
+
+class IndexVectorSource(BaseModel):
+    """A vector given either as raw embedding or as skills to embed"""
+    skills: Optional[List[str]] = Field(default=None, min_items=1, max_items=100)
+    embedding: Optional[List[float]] = Field(default=None, min_items=1, max_items=4096)
+    
+    @field_validator('skills')
+    @classmethod
+    def validate_skills(cls, v):
+        if v is None:
+            return v
+        sanitized = [s.strip()[:100] for s in v if isinstance(s, str) and s.strip()]
+        if not sanitized:
+            raise ValueError('No valid skills provided')
+        return sanitized
+
+class IndexUpsertRequest(IndexVectorSource):
+    user_id: str = Field(..., min_length=1, max_length=128)
+
+class IndexQueryRequest(IndexVectorSource):
+    # Query by a stored user's vector (the user is excluded from results)
+    user_id: Optional[str] = Field(default=None, min_length=1, max_length=128)
+
+class IndexDeleteRequest(BaseModel):
+    user_id: str = Field(..., min_length=1, max_length=128)
+
+class IndexMatch(BaseModel):
+    user_id: str
+    similarity: float
+
+class IndexQueryResponse(BaseModel):
+    matches: List[IndexMatch]
+    mode: str
+    index_size: int
+    processing_time: float
+
 class RecommendationRequest(BaseModel):
     skills: List[str] = Field(..., min_items=1, max_items=50)
     num_recommendations: Optional[int] = Field(default=5, ge=1, le=20)
@@ -194,6 +423,7 @@ class RecommendationRequest(BaseModel):
 
 class RecommendationResponse(BaseModel):
     recommendations: List[str]
+    scores: List[float] = []  # graph relevance per recommendation (0.0 = popular-skill filler)
     count: int
     processing_time: float
 
@@ -209,6 +439,14 @@ class GitHubAnalysisRequest(BaseModel):
             raise ValueError('Username cannot be empty')
         return v
 
+GITHUB_USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9-]{1,39}$')
+
+class GitHubBatchRequest(BaseModel):
+    # Usernames are validated per item so one bad entry is reported inline, not a 422
+    usernames: List[str] = Field(..., min_length=1, max_length=5000)
+    access_token: Optional[str] = None
+    concurrency: int = Field(4, ge=1, le=16)
+
 class SkillData(BaseModel):
     name: str
     level: str
@@ -225,6 +463,35 @@ class TrajectoryResponse(BaseModel):
     roadmap: List[str]
     ai_analysis: str
     gravity_index: float
+    target_role: Optional[str] = None        # role the request was matched to
+    role_confidence: Optional[float] = None  # 1.0 exact name/alias, else cosine similarity
+    processing_time: float
+
+class TrajectoryBatchUser(BaseModel):
+    user_id: str = Field(..., min_length=1, max_length=100)
+    skills: List[SkillData] = Field(..., max_length=200)
+
+class TrajectoryBatchRequest(BaseModel):
+    users: List[TrajectoryBatchUser] = Field(..., min_length=1, max_length=10000)
+    top_roles: int = Field(default=3, ge=1, le=10)
+
+class RoleFit(BaseModel):
+    role: str
+    fit_score: float
+    learn: int     # required skills missing entirely
+    improve: int   # required skills below intermediate
+
+class TrajectoryBatchResult(BaseModel):
+    user_id: str
+    trajectory: str
+    gravity_index: float
+    drifting_skills: List[str]
+    best_fit_roles: List[RoleFit]
+    gap_counts: Dict[str, int]
+
+class TrajectoryBatchResponse(BaseModel):
+    results: List[TrajectoryBatchResult]
+    count: int
     processing_time: float
 
 class HealthResponse(BaseModel):
@@ -280,8 +547,13 @@ async def root():
             "metrics": "/metrics",
             "embed": "/embed",
             "similarity": "/similarity",
+            "similarity_batch": "/similarity/batch",
+            "index_upsert": "/index/upsert",
+            "index_query": "/index/query",
+            "index_delete": "/index/delete",
             "recommend": "/recommend",
-            "analyze_github": "/analyze_github"
+            "analyze_github": "/analyze_github",
+            "analyze_github_batch": "/analyze_github/batch"
         },
         "documentation": "/docs"
     }
@@ -322,15 +594,52 @@ async def metrics():
         "errors_total": error_count,
         "error_rate": error_count / max(request_count, 1),
         "is_model_loaded": embedding_generator is not None and embedding_generator.model is not None,
+        "embedding_cache": embedding_generator.cache.stats() if embedding_generator is not None else None,
+        "embedding_batcher": embedding_batcher.stats() if embedding_batcher is not None else None,
+        "embedding_rate_limiter": embedding_generator.rate_limiter.stats() if embedding_generator is not None else None,
+        "github_result_cache": github_result_cache.stats() if github_result_cache is not None else None,
+        "github_http_cache": github_analyzer.http_cache.stats() if github_analyzer is not None else None,
+        "github_rate_limit": github_analyzer.rate_limit_stats() if github_analyzer is not None else None,
+        "github_user_state": github_analyzer.state_store.stats() if github_analyzer is not None else None,
+        "github_language_cache": github_analyzer.language_cache.stats() if github_analyzer is not None else None,
+        "vector_index": vector_index.stats() if vector_index is not None else None,
+        "skill_graph": skill_graph.stats() if skill_graph is not None else None,
+        "role_resolver": role_resolver.stats() if role_resolver is not None else None,
+        "question_pool": question_pool.stats() if question_pool is not None else None,
+        "sandbox": sandbox_pool.stats() if sandbox_pool is not None else None,
+        "complexity_cache": interview_manager.analyzer.stats(),
+        "noor_reply_cache": persona.reply_cache.stats(),
+        "executors": {
+            "embedding": embedding_generator.executor.stats() if embedding_generator is not None else None,
+            "generation": persona.executor.stats(),
+            "github": github_analyzer.executor.stats() if github_analyzer is not None else None,
+            "sandbox": sandbox_pool.executor.stats() if sandbox_pool is not None else None,
+            "vector_index": vector_index.executor.stats() if vector_index is not None else None,
+            "complexity": interview_manager.analyzer.executor.stats()
+        },
         "timestamp": time.time()
     }
 
-@app.post("/embed", response_model=SkillEmbeddingResponse)
-async def generate_embedding(request: SkillEmbeddingRequest):
+async def _embed_composed_skills(skills: List[str], skill_weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Embed each canonical skill once and pool them.
+    Atoms are cached individually, so only never-seen skills reach Gemini.
+    """
+    atoms = list(dict.fromkeys(EmbeddingGenerator.canonical_skill(s) for s in skills))
+    atom_embeddings = await embedding_batcher.embed_many(atoms)
+    
+    weights = None
+    if skill_weights:
+        canonical_weights = {EmbeddingGenerator.canonical_skill(k): v for k, v in skill_weights.items()}
+        weights = [canonical_weights.get(atom, 1.0) for atom in atoms]
+    return embedding_generator.compose_skill_set(atom_embeddings, weights)
+
+@app.post("/embed", response_model=SkillEmbeddingResponse, response_model_exclude_none=True)
+async def generate_embedding(request: SkillEmbeddingRequest, http_request: Request):
     """
     Generate embedding vector for a list of skills
     Security: Input validation via Pydantic
-    Performance: Optimized batch processing
+    Performance: Optimized batch processing, compact float16/int8 wire formats
     """
     start = time.time()
     
@@ -341,14 +650,22 @@ async def generate_embedding(request: SkillEmbeddingRequest):
                 detail="Embedding model not loaded"
             )
         
-        logger.info(f"Generating embedding for {len(request.skills)} skills")
+        wants_binary = "application/octet-stream" in http_request.headers.get("accept", "")
+        if not wants_binary and request.encoding == "list" and request.dtype != "float32":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"dtype {request.dtype} requires encoding=base64 or Accept: application/octet-stream"
+            )
         
-        # Concatenate skills into a single text
-        skills_text = " ".join(request.skills)
+        logger.info(f"Generating embedding for {len(request.skills)} skills ({request.mode})")
         
         # Generate embedding with timeout protection
         try:
-            embedding = embedding_generator.generate_embedding(skills_text)
+            if request.mode == "composed":
+                embedding = await _embed_composed_skills(request.skills, request.skill_weights)
+            else:
+                # Concatenate skills into a single text
+                embedding = await embedding_batcher.embed(" ".join(request.skills))
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
             raise HTTPException(
@@ -358,6 +675,26 @@ async def generate_embedding(request: SkillEmbeddingRequest):
         
         processing_time = time.time() - start
         
+        if wants_binary or request.encoding == "base64":
+            payload, scale = encode_embedding(embedding, request.dtype)
+            if wants_binary:
+                headers = {
+                    "X-Embedding-Dtype": request.dtype,
+                    "X-Embedding-Dim": str(len(embedding)),
+                    "X-Processing-Time": str(processing_time)
+                }
+                if scale is not None:
+                    headers["X-Embedding-Scale"] = repr(scale)
+                return Response(content=payload, media_type="application/octet-stream", headers=headers)
+            
+            return SkillEmbeddingResponse(
+                embedding_b64=base64.b64encode(payload).decode("ascii"),
+                dtype=request.dtype,
+                scale=scale,
+                dimension=len(embedding),
+                processing_time=processing_time
+            )
+        
         return SkillEmbeddingResponse(
             embedding=embedding.tolist(),
             dimension=len(embedding),
@@ -390,12 +727,11 @@ async def calculate_similarity(request: SimilarityRequest):
         
         logger.info("Calculating similarity between skill sets")
         
-        # Generate embeddings
+        # Generate embeddings (both sides in one upstream call)
         text1 = " ".join(request.skills1)
         text2 = " ".join(request.skills2)
         
-        embedding1 = embedding_generator.generate_embedding(text1)
-        embedding2 = embedding_generator.generate_embedding(text2)
+        embedding1, embedding2 = await embedding_batcher.embed_many([text1, text2])
         
         # Calculate cosine similarity
         similarity = float(
@@ -423,72 +759,178 @@ async def calculate_similarity(request: SimilarityRequest):
             detail="Failed to calculate similarity"
         )
 
+@app.post("/similarity/batch", response_model=BatchSimilarityResponse)
+async def calculate_batch_similarity(request: BatchSimilarityRequest):
+    """
+    Score one query skill set against many candidate skill sets
+    Performance: all skill sets are embedded in one batched call and scored as one matrix product
+    """
+    start = time.time()
+    
+    try:
+        if embedding_generator is None or embedding_generator.model is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Embedding model not loaded"
+            )
+        
+        logger.info(f"Calculating similarity for 1 x {len(request.candidates)} skill sets")
+        
+        texts = [" ".join(request.query)] + [" ".join(skills) for skills in request.candidates]
+        embeddings = await embedding_batcher.embed_many(texts)
+        
+        # 1 x M similarity row, clamped to [0, 1] like /similarity
+        scores = np.clip(batch_cosine_similarity(embeddings[:1], embeddings[1:])[0], 0.0, 1.0)
+        
+        # Rank by score desc, then request order, so ties are deterministic
+        top = np.lexsort((np.arange(len(scores)), -scores))[:request.top_k or len(scores)]
+        
+        processing_time = time.time() - start
+        
+        return BatchSimilarityResponse(
+            scores=scores.tolist(),
+            ranking=[RankedCandidate(index=int(i), similarity=float(scores[i])) for i in top],
+            method="cosine",
+            processing_time=processing_time
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating batch similarity: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to calculate batch similarity"
+        )
+
+async def _resolve_index_vector(source: IndexVectorSource) -> Optional[np.ndarray]:
+    """Raw embedding wins; otherwise embed the skills through the batcher"""
+    if source.embedding is not None:
+        return np.asarray(source.embedding, dtype=np.float32)
+    if source.skills:
+        if embedding_generator is None or embedding_generator.model is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Embedding model not loaded"
+            )
+        return await embedding_batcher.embed(" ".join(source.skills))
+    return None
+
+@app.post("/index/upsert")
+async def index_upsert(request: IndexUpsertRequest):
+    """Insert or replace a user's embedding in the vector index"""
+    start = time.time()
+    
+    try:
+        vector = await _resolve_index_vector(request)
+        if vector is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide either skills or embedding"
+            )
+        vector_index.upsert(request.user_id, vector)
+        
+        return {
+            "user_id": request.user_id,
+            "dimension": int(vector.size),
+            "index_size": len(vector_index),
+            "processing_time": time.time() - start
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error upserting {request.user_id} into vector index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update vector index"
+        )
+
+@app.post("/index/query", response_model=IndexQueryResponse)
+async def index_query(
+    request: IndexQueryRequest,
+    k: int = Query(default=10, ge=1, le=1000),
+    mode: str = Query(default="auto", pattern="^(auto|exact|ivf)$")
+):
+    """
+    Top-k nearest users by cosine similarity
+    Performance: exact scan for small populations, IVF probing above VECTOR_INDEX_IVF_THRESHOLD.
+    `mode` in the response is the search actually run ("exact" until the first IVF training finishes).
+    """
+    start = time.time()
+    
+    try:
+        vector = await _resolve_index_vector(request)
+        if vector is None and request.user_id is not None:
+            vector = vector_index.get(request.user_id)
+            if vector is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"User {request.user_id} is not indexed"
+                )
+        if vector is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide user_id, skills or embedding"
+            )
+        
+        matches, mode_used = await vector_index.aquery(vector, k=k, mode=mode, exclude=request.user_id)
+        
+        return IndexQueryResponse(
+            matches=[IndexMatch(user_id=user_id, similarity=score) for user_id, score in matches],
+            mode=mode_used,
+            index_size=len(vector_index),
+            processing_time=time.time() - start
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error querying vector index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to query vector index"
+        )
+
+@app.post("/index/delete")
+async def index_delete(request: IndexDeleteRequest):
+    """Remove a user from the vector index"""
+    deleted = vector_index.delete(request.user_id)
+    return {"user_id": request.user_id, "deleted": deleted, "index_size": len(vector_index)}
+
 @app.post("/recommend", response_model=RecommendationResponse)
 async def recommend_skills(request: RecommendationRequest):
     """
     Recommend related skills based on current skills
-    Enhanced with more comprehensive skill relationships
+    Ranked by multi-hop propagation over the precomputed skill graph
     """
     start = time.time()
     
     try:
         logger.info(f"Generating recommendations for {len(request.skills)} skills")
         
-        # Enhanced skill relationships database
-        skill_relationships = {
-            "javascript": ["typescript", "react", "nodejs", "vue", "angular", "nextjs", "webpack"],
-            "typescript": ["javascript", "angular", "react", "nodejs", "deno", "nest"],
-            "python": ["django", "flask", "fastapi", "pandas", "numpy", "machine-learning", "pytorch"],
-            "react": ["redux", "nextjs", "typescript", "graphql", "webpack", "jest", "react-native"],
-            "nodejs": ["express", "nestjs", "mongodb", "postgresql", "redis", "graphql", "typescript"],
-            "java": ["spring", "kotlin", "maven", "gradle", "junit", "hibernate", "microservices"],
-            "go": ["kubernetes", "docker", "microservices", "grpc", "postgresql", "redis"],
-            "rust": ["webassembly", "systems-programming", "tokio", "actix", "performance"],
-            "docker": ["kubernetes", "docker-compose", "ci-cd", "devops", "containerization"],
-            "kubernetes": ["docker", "helm", "terraform", "istio", "prometheus", "grafana"],
-            "aws": ["cloud", "terraform", "lambda", "s3", "ec2", "dynamodb", "cloudformation"],
-            "azure": ["cloud", "arm-templates", "azure-functions", "cosmos-db"],
-            "gcp": ["cloud", "terraform", "cloud-functions", "bigquery", "kubernetes"],
-            "machine-learning": ["python", "tensorflow", "pytorch", "scikit-learn", "pandas", "numpy"],
-            "tensorflow": ["python", "keras", "machine-learning", "deep-learning", "computer-vision"],
-            "pytorch": ["python", "machine-learning", "deep-learning", "transformers", "nlp"],
-            "mongodb": ["nodejs", "mongoose", "express", "database", "nosql"],
-            "postgresql": ["sql", "database", "sequelize", "prisma", "backend"],
-            "redis": ["caching", "nodejs", "python", "database", "session-management"],
-            "graphql": ["apollo", "relay", "react", "nodejs", "api-design"],
-            "rest": ["api-design", "nodejs", "express", "swagger", "postman"],
-            "ci-cd": ["jenkins", "github-actions", "gitlab-ci", "docker", "kubernetes"],
-            "testing": ["jest", "mocha", "pytest", "cypress", "selenium"],
-        }
-        
-        recommendations = set()
+        # Seeds: skills as given, or their canonical taxonomy name when the graph does not know them
         current_skills_lower = [skill.lower() for skill in request.skills]
+        seeds = set(current_skills_lower)
+        seeds.update(
+            skill_taxonomy.resolve(skill) or skill
+            for skill in current_skills_lower
+            if skill not in skill_graph
+        )
         
-        # Find related skills
-        for skill in current_skills_lower:
-            if skill in skill_relationships:
-                for related_skill in skill_relationships[skill]:
-                    if related_skill not in current_skills_lower:
-                        recommendations.add(related_skill)
-        
-        # Convert to list and limit
-        recommended_list = list(recommendations)[:request.num_recommendations]
-        
-        # If no recommendations found, return popular complementary skills
-        if not recommended_list:
-            popular_skills = [
-                "docker", "kubernetes", "typescript", "graphql", "ci-cd",
-                "testing", "microservices", "cloud", "api-design", "devops"
-            ]
-            recommended_list = [
-                s for s in popular_skills 
-                if s not in current_skills_lower
-            ][:request.num_recommendations]
+        # Multi-hop ranking over the precomputed graph (popular skills fill any remaining slots)
+        ranked = skill_graph.recommend(seeds, request.num_recommendations)
+        recommended_list = [skill for skill, _ in ranked]
         
         processing_time = time.time() - start
         
         return RecommendationResponse(
             recommendations=recommended_list,
+            scores=[score for _, score in ranked],
             count=len(recommended_list),
             processing_time=processing_time
         )
@@ -500,6 +942,33 @@ async def recommend_skills(request: RecommendationRequest):
             detail="Failed to generate recommendations"
         )
 
+def _github_result_key(username: str, access_token: Optional[str]) -> str:
+    # Per credential, like the HTTP cache: a token can see private repos an anonymous lookup must not get
+    return f"{username.lower()}#{credential_identity(access_token)}"
+
+def _github_analysis_payload(username: str, analysis: Dict, cache_status: str, processing_time: float) -> Dict:
+    return {
+        "username": username,
+        "skills_identified": analysis.get("skills", []),
+        "top_languages": analysis.get("languages", []),
+        "repositories_analyzed": analysis.get("repo_count", 0),
+        "analysis_complete": True,
+        "cache_status": cache_status,
+        "processing_time": processing_time
+    }
+
+async def _wait_for_github_quota(access_token: Optional[str] = None):
+    """
+    Back-off per credential: once GitHub reports X-RateLimit-Remaining at or below the
+    low watermark for this token (or the anonymous quota), new analyses made with it
+    sleep until its window resets (capped). Batches using other tokens carry on.
+    """
+    pause = github_analyzer.rate_limit_pause(int(os.getenv("GITHUB_RATE_LIMIT_LOW_WATERMARK", "50")), access_token)
+    if pause > 0:
+        pause = min(pause, float(os.getenv("GITHUB_RATE_LIMIT_MAX_PAUSE_SECONDS", "900")))
+        logger.warning(f"GitHub rate limit nearly exhausted for credential {credential_identity(access_token)}, pausing its analyses for {pause:.0f}s")
+        await asyncio.sleep(pause)
+
 @app.post("/analyze_github")
 async def analyze_github_profile(request: GitHubAnalysisRequest):
     """
@@ -517,11 +986,11 @@ async def analyze_github_profile(request: GitHubAnalysisRequest):
                 detail="GitHub analyzer not initialized"
             )
         
-        # Analyze with timeout (30 seconds)
+        # Analyze with timeout (30 seconds); repeat lookups are served from the result cache
         try:
-            analysis = github_analyzer.analyze_user(
-                request.username, 
-                request.access_token
+            analysis, cache_status = await github_result_cache.get_or_compute(
+                _github_result_key(request.username, request.access_token),
+                lambda: github_analyzer.aanalyze_user(request.username, request.access_token)
             )
         except Exception as e:
             logger.error(f"GitHub analysis failed for {request.username}: {e}")
@@ -532,14 +1001,7 @@ async def analyze_github_profile(request: GitHubAnalysisRequest):
         
         processing_time = time.time() - start
         
-        return {
-            "username": request.username,
-            "skills_identified": analysis.get("skills", []),
-            "top_languages": analysis.get("languages", []),
-            "repositories_analyzed": analysis.get("repo_count", 0),
-            "analysis_complete": True,
-            "processing_time": processing_time
-        }
+        return _github_analysis_payload(request.username, analysis, cache_status, processing_time)
         
     except HTTPException:
         raise
@@ -550,6 +1012,106 @@ async def analyze_github_profile(request: GitHubAnalysisRequest):
             detail="Failed to analyze GitHub profile"
         )
     
+@app.post("/analyze_github/batch")
+async def analyze_github_batch(request: GitHubBatchRequest):
+    """
+    Analyze many GitHub profiles with bounded concurrency.
+    Streams NDJSON, one line per user in completion order; a failed user
+    yields {"username", "analysis_complete": false, "error"} and the batch carries on.
+    """
+    if github_analyzer is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GitHub analyzer not initialized"
+        )
+    
+    logger.info(f"Batch GitHub analysis: {len(request.usernames)} users, concurrency {request.concurrency}")
+    semaphore = asyncio.Semaphore(request.concurrency)
+    
+    async def fetch(username: str) -> Dict:
+        # Only real fetches wait on the quota; cached results are served straight away
+        await _wait_for_github_quota(request.access_token)
+        return await github_analyzer.aanalyze_user(username, request.access_token)
+    
+    async def analyze_one(username: str) -> Dict:
+        username = username.strip()
+        if not GITHUB_USERNAME_PATTERN.match(username):
+            return {"username": username, "analysis_complete": False, "error": "Invalid GitHub username"}
+        async with semaphore:
+            start = time.time()
+            try:
+                analysis, cache_status = await github_result_cache.get_or_compute(
+                    _github_result_key(username, request.access_token), lambda: fetch(username)
+                )
+            except Exception as e:
+                logger.error(f"GitHub analysis failed for {username}: {e}")
+                return {"username": username, "analysis_complete": False, "error": f"Failed to analyze GitHub profile: {str(e)}"}
+            return _github_analysis_payload(username, analysis, cache_status, time.time() - start)
+    
+    async def stream():
+        tasks = [asyncio.create_task(analyze_one(username)) for username in request.usernames]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away (or we are done): drop whatever has not started
+            for task in tasks:
+                task.cancel()
+    
+    # Not compressed (STREAMING_PATHS), so each line reaches the client as it completes
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# ===== CAREER TRAJECTORY DATA =====
+LEVEL_MAP = {"beginner": 0.3, "intermediate": 0.6, "advanced": 0.85, "expert": 1.0}
+
+# Role Requirements (The "Galaxy Map")
+ROLE_GALAXY = {
+    "Senior Full Stack Engineer": {
+        "required": ["javascript", "react", "nodejs", "typescript", "system-design", "docker", "testing"],
+        "optional": ["graphql", "aws", "nextjs"]
+    },
+    "AI & Machine Learning Engineer": {
+        "required": ["python", "pytorch", "tensorflow", "mathematics", "pandas", "data-structures"],
+        "optional": ["nlp", "computer-vision", "mlops", "docker"]
+    },
+    "DevOps & Cloud Architect": {
+        "required": ["docker", "kubernetes", "aws", "terraform", "ci-cd", "linux", "networking"],
+        "optional": ["go", "python", "monitoring", "security"]
+    },
+    "Blockchain Developer": {
+        "required": ["solidity", "ethereum", "javascript", "cryptography", "smart-contracts", "web3"],
+        "optional": ["rust", "go", "defi"]
+    },
+    "Frontend Architect": {
+        "required": ["javascript", "react", "css-architecture", "performance", "accessibility", "typescript"],
+        "optional": ["web-components", "design-systems", "figma"]
+    },
+    "Backend Systems Engineer": {
+        "required": ["java", "go", "database-design", "microservices", "redis", "kafka", "system-design"],
+        "optional": ["nodejs", "rust", "grpc"]
+    },
+    "Data Scientist": {
+        "required": ["python", "sql", "statistics", "pandas", "visualization", "machine-learning"],
+        "optional": ["r", "big-data", "spark"]
+    }
+}
+
+# Alternative titles per role, for resolving free-form target_role values
+ROLE_ALIASES = {
+    "Senior Full Stack Engineer": ["full stack engineer", "full stack developer", "fullstack developer", "software engineer",
+                                   "software developer", "web developer", "swe", "mern stack developer", "javascript developer"],
+    "AI & Machine Learning Engineer": ["ml engineer", "machine learning engineer", "ai engineer", "deep learning engineer",
+                                       "applied scientist", "mlops engineer", "nlp engineer", "computer vision engineer", "llm engineer"],
+    "DevOps & Cloud Architect": ["devops engineer", "sre", "site reliability engineer", "cloud engineer", "cloud architect",
+                                 "platform engineer", "infrastructure engineer", "aws architect"],
+    "Blockchain Developer": ["blockchain engineer", "web3 developer", "smart contract developer", "solidity developer", "crypto engineer"],
+    "Frontend Architect": ["frontend engineer", "frontend developer", "front end developer", "ui engineer", "react developer", "web designer"],
+    "Backend Systems Engineer": ["backend engineer", "backend developer", "back end developer", "systems engineer",
+                                 "distributed systems engineer", "java developer", "go developer", "api developer"],
+    "Data Scientist": ["data science", "data analyst", "analytics engineer", "statistician", "research scientist",
+                       "business intelligence analyst"]
+}
+
 @app.post("/analyze-trajectory", response_model=TrajectoryResponse)
 async def analyze_trajectory(request: TrajectoryRequest):
     """
@@ -568,8 +1130,7 @@ async def analyze_trajectory(request: TrajectoryRequest):
         # 1. Analyze Physics & Detect Drift
         for skill in request.skills:
             # Normalize level
-            level_map = {"beginner": 0.3, "intermediate": 0.6, "advanced": 0.85, "expert": 1.0}
-            proficiency = level_map.get(skill.level.lower(), 0.1)
+            proficiency = LEVEL_MAP.get(skill.level.lower(), 0.1)
             
             # Map for later comparison
             current_skills_map[skill.name.lower()] = proficiency
@@ -584,42 +1145,10 @@ async def analyze_trajectory(request: TrajectoryRequest):
                 )
                 trajectory_status = "drifting"
 
-        # 2. Define Role Requirements (The "Galaxy Map")
-        role_galaxy = {
-            "Senior Full Stack Engineer": {
-                "required": ["javascript", "react", "nodejs", "typescript", "system-design", "docker", "testing"],
-                "optional": ["graphql", "aws", "nextjs"]
-            },
-            "AI & Machine Learning Engineer": {
-                "required": ["python", "pytorch", "tensorflow", "mathematics", "pandas", "data-structures"],
-                "optional": ["nlp", "computer-vision", "mlops", "docker"]
-            },
-            "DevOps & Cloud Architect": {
-                "required": ["docker", "kubernetes", "aws", "terraform", "ci-cd", "linux", "networking"],
-                "optional": ["go", "python", "monitoring", "security"]
-            },
-            "Blockchain Developer": {
-                "required": ["solidity", "ethereum", "javascript", "cryptography", "smart-contracts", "web3"],
-                "optional": ["rust", "go", "defi"]
-            },
-            "Frontend Architect": {
-                "required": ["javascript", "react", "css-architecture", "performance", "accessibility", "typescript"],
-                "optional": ["web-components", "design-systems", "figma"]
-            },
-            "Backend Systems Engineer": {
-                "required": ["java", "go", "database-design", "microservices", "redis", "kafka", "system-design"],
-                "optional": ["nodejs", "rust", "grpc"]
-            },
-            "Data Scientist": {
-                "required": ["python", "sql", "statistics", "pandas", "visualization", "machine-learning"],
-                "optional": ["r", "big-data", "spark"]
-            }
-        }
-
-        # 3. Generate Roadmap
-        target_role_key = request.target_role or "Senior Full Stack Engineer"
-        # Fuzzy match or default
-        target_role_data = role_galaxy.get(target_role_key, role_galaxy["Senior Full Stack Engineer"])
+        # 2. Generate Roadmap
+        # Fuzzy match ("ML Engineer", "SRE") or default
+        target_role_key, role_confidence = role_resolver.resolve(request.target_role or "Senior Full Stack Engineer")
+        target_role_data = ROLE_GALAXY[target_role_key]
         
         roadmap_steps = []
         
@@ -641,7 +1170,7 @@ async def analyze_trajectory(request: TrajectoryRequest):
         if not roadmap_steps:
              roadmap_steps.append("You are fully qualified! Focus on leadership and mentoring.")
 
-        # 4. Generate Insight
+        # 3. Generate Insight
         if trajectory_status == "drifting":
             analysis = f"Drift Detected. {len(drift_warnings)} skills are decaying. Stabilize your core before expanding."
         elif not roadmap_steps or roadmap_steps[0].startswith("You are full"):
@@ -661,6 +1190,8 @@ async def analyze_trajectory(request: TrajectoryRequest):
             roadmap=roadmap_steps, # NEW FIELD
             ai_analysis=analysis,
             gravity_index=round(total_gravity / max(len(request.skills), 1), 2),
+            target_role=target_role_key,
+            role_confidence=role_confidence,
             processing_time=processing_time
         )
 
@@ -671,8 +1202,40 @@ async def analyze_trajectory(request: TrajectoryRequest):
             detail=f"Trajectory analysis failed: {str(e)}"
         )
 
+@app.post("/analyze-trajectory/batch", response_model=TrajectoryBatchResponse)
+async def analyze_trajectory_batch(request: TrajectoryBatchRequest):
+    """
+    Trajectory analysis for many users at once.
+    Every user is scored against every role in one matrix computation:
+    gap counts, drift, gravity index and best-fit roles.
+    """
+    start = time.time()
+    try:
+        logger.info(f"Batch trajectory analysis for {len(request.users)} users")
+        
+        analyses = role_matrix.analyze(
+            [[(skill.name, skill.level, skill.gravityScore) for skill in user.skills] for user in request.users],
+            top_roles=request.top_roles
+        )
+        results = [
+            TrajectoryBatchResult(user_id=user.user_id, **analysis)
+            for user, analysis in zip(request.users, analyses)
+        ]
+        
+        return TrajectoryBatchResponse(
+            results=results,
+            count=len(results),
+            processing_time=time.time() - start
+        )
+    
+    except Exception as e:
+        logger.error(f"Batch trajectory analysis failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch trajectory analysis failed: {str(e)}"
+        )
+
 # ... (Existing imports)
-import ast
 import json
 import uuid
 
@@ -680,6 +1243,11 @@ import uuid
 
 class InterviewManager:
     def __init__(self):
+        # Pre-generated AI questions (QuestionPool), attached at startup; it also remembers which were
+        # handed out, by id, so /interview/evaluate can run their test_case from any worker
+        self.pool = None
+        # Static Big-O estimate, cached per normalized submission
+        self.analyzer = ComplexityAnalyzer(cache_size=int(os.getenv("COMPLEXITY_CACHE_SIZE", "4096")))
         self.question_bank = {
             "easy": [
                 {"id": "e1", "title": "Reverse String", "description": "Write a function to reverse a string.", "template": "def reverse_string(s):\n    pass", "test_case": "reverse_string('hello') == 'olleh'"},
@@ -723,49 +1291,63 @@ class InterviewManager:
             data = json.loads(text)
             data['id'] = str(uuid.uuid4())
             return data
+        except ResourceExhausted:
+            raise  # callers own the circuit breaker
         except Exception as e:
             logger.error(f"AI Question Gen Failed: {e}")
             return None
 
-    def get_question(self, difficulty="medium", topic="dsa"):
+    async def get_question(self, difficulty="medium", topic="dsa"):
         import random
         
-        # Try AI Generation first if available
-        # We access the global persona manager to see if LLM is active
-        try:
-            from __main__ import persona
-            if hasattr(persona, 'use_llm') and persona.use_llm:
-                 q = self.generate_ai_question(difficulty, topic, persona.model)
-                 if q:
-                     return q
-        except ImportError:
-            # Fallback if circular import or context issue
-            pass
-
-        # Fallback to static bank
+        # AI questions are generated in the background - serving is just a pop
+        if self.pool is not None:
+            q = self.pool.pop(difficulty, topic)
+            if q:
+                await self.pool.remember(q)
+                return q
+
+        # Fallback to static bank (pool empty or LLM unavailable)
         pool = self.question_bank.get(difficulty.lower(), self.question_bank["medium"])
         question = random.choice(pool)
         return question
 
-    def evaluate_submission(self, code, language="python"):
+    async def find_question(self, question_id):
+        """Look up a question by id: AI questions served by any worker, then the static bank."""
+        if self.pool is not None:
+            question = await self.pool.find(question_id)
+            if question is not None:
+                return question
+        for questions in self.question_bank.values():
+            for question in questions:
+                if question["id"] == question_id:
+                    return question
+        return None
+
+    async def evaluate_submission(self, code, language="python"):
         """
         Performs static analysis on the code.
         """
         try:
-            tree = ast.parse(code)
-            
-            # Simple Heuristics
-            has_loop = any(isinstance(node, (ast.For, ast.While)) for node in ast.walk(tree))
+            complexity = await self.analyzer.aanalyze(code)
             
-            analysis = "Syntax is valid. "
-            if has_loop:
-                analysis += "Iterative approach detected. Good for memory efficiency. "
-            else:
-                analysis += "No explicit loops found. "
+            analysis = f"Syntax is valid. Estimated time complexity: {complexity['big_o']}. "
+            if complexity["max_loop_depth"] > 1:
+                analysis += f"Loops nested {complexity['max_loop_depth']} deep. "
+            for name in complexity["recursive_functions"]:
+                if name in complexity["memoized_functions"]:
+                    analysis += f"Memoised recursion in {name}() - repeated subproblems are computed once. "
+                else:
+                    analysis += f"Recursive approach in {name}(). "
+            for pattern in complexity["quadratic_patterns"]:
+                analysis += f"Line {pattern['line']}: {pattern['pattern']}. "
+            if not complexity["quadratic_patterns"]:
+                analysis += "Code structure looks solid based on static analysis."
             
             return {
                 "status": "accepted",
-                "feedback": analysis + "Code structure looks solid based on static analysis.",
+                "feedback": analysis.strip(),
+                "complexity": complexity,
                 "xp": 0 # XP is assigned by the Controller based on difficulty now
             }
         except SyntaxError as e:
@@ -788,13 +1370,13 @@ class InterviewRequest(BaseModel):
     topic: str = "dsa"
 
 class EvaluationRequest(BaseModel):
-    code: str
+    code: str = Field(..., max_length=MAX_SOURCE_CHARS)
     language: str = "python"
     questionId: str
 
 @app.post("/interview/generate")
 async def generate_interview_question(request: InterviewRequest):
-    q = interview_manager.get_question(request.difficulty, request.topic)
+    q = await interview_manager.get_question(request.difficulty, request.topic)
     return {
         "question": q,
         "message": f"I have retrieved a {request.difficulty} problem from the archives. {q['title']}. {q['description']}"
@@ -802,7 +1384,37 @@ async def generate_interview_question(request: InterviewRequest):
 
 @app.post("/interview/evaluate")
 async def evaluate_interview_submission(request: EvaluationRequest):
-    result = interview_manager.evaluate_submission(request.code, request.language)
+    result = await interview_manager.evaluate_submission(request.code, request.language)
+    if result["status"] != "accepted" or sandbox_pool is None or request.language.lower() != "python":
+        return result
+
+    # Static analysis passed - now actually run it against the question's test case
+    question = await interview_manager.find_question(request.questionId)
+    if question is None:
+        # Say so rather than look like a run that was skipped silently
+        result["execution"] = {"status": "not_executed", "reason": "unknown question id"}
+        result["feedback"] += " The code was not executed: this question's test case is not available."
+        return result
+    if not has_test_case(question.get("test_case")):
+        # `pass` / `True` would report any code that runs as passing
+        result["execution"] = {"status": "not_executed", "reason": "no test case"}
+        result["feedback"] += " The code was not executed: this question has no test case."
+        return result
+    execution = await sandbox_pool.run(request.code, question.get("test_case"))
+    # Verdict and resource usage only - never what the submission printed or read
+    result["execution"] = {
+        key: execution[key]
+        for key in ("status", "passed", "runtime_ms", "cpu_ms", "peak_memory_kb", "wall_ms", "error")
+        if key in execution
+    }
+    if execution["status"] == "unavailable":
+        # Not run at all - the static verdict stands
+        result["feedback"] += " The code was not executed: the sandbox is unavailable."
+    elif execution["passed"]:
+        result["feedback"] += f" Test case passed in {execution['runtime_ms']:.1f} ms."
+    else:
+        result["status"] = "rejected"
+        result["feedback"] = f"Execution {execution['status'].replace('_', ' ')}: {execution.get('error') or 'test case returned False'}."
     return result
 
 class ChatRequest(BaseModel):
@@ -822,6 +1434,17 @@ class PersonaManager:
         self.last_error_time = 0
         self.COOLDOWN_SECONDS = 300  # 5 Minutes Cooldown on Error
         
+        # Blocking generate_content calls run here, with their own concurrency cap
+        self.executor = UpstreamExecutor("generation", max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", "2")))
+        # LLM replies reused for near-identical messages about the same problem (local embeddings, no quota)
+        self.reply_cache = SemanticResponseCache(
+            HashingEmbedder(dim=int(os.getenv("LOCAL_EMBEDDING_DIM", "768"))).embed,
+            threshold=float(os.getenv("NOOR_CACHE_THRESHOLD", "0.9")),
+            max_words=int(os.getenv("NOOR_CACHE_MAX_WORDS", "8")),
+            max_entries=int(os.getenv("NOOR_CACHE_MAX_ENTRIES", "2048")),
+            ttl=float(os.getenv("NOOR_CACHE_TTL_SECONDS", "86400"))
+        )
+        
         if api_key:
             try:
                 genai.configure(api_key=api_key)
@@ -833,43 +1456,62 @@ class PersonaManager:
         else:
             logger.warning("⚠️ No GEMINI_API_KEY found. Falling back to Rule-Based Persona.")
 
+    def llm_available(self) -> bool:
+        """LLM configured and the circuit breaker closed."""
+        return self.use_llm and time.time() - self.last_error_time >= self.COOLDOWN_SECONDS
+
     def process_message(self, message: str, context: Optional[str] = None) -> str:
         msg = message.lower().strip()
         
         # 0. LLM Path (Real AI) - WITH STRICT CIRCUIT BREAKER
         # If we hit a limit recently, enforce a strict cooldown to prevent any "extra extraction"
         if self.use_llm:
+            # A cached LLM reply costs no quota - and still answers while the breaker is open
+            cached = self.reply_cache.get(context, message)
+            if cached is not None:
+                return cached
             time_since_error = time.time() - self.last_error_time
             if time_since_error < self.COOLDOWN_SECONDS:
                  logger.warning(f"❄️ Circuit Breaker Active. Skipping LLM for {int(self.COOLDOWN_SECONDS - time_since_error)}s.")
                  # Fall through to Rule-Based Logic below automatically
             else:
                 try:
-                    system_prompt = (
-                        f"You are Noor, an advanced AI Sentinel and Coding Mentor. "
-                        f"Your Tone: Futuristic, Professional, Encouraging, slightly Sci-Fi (Cyberpunk). "
-                        f"Context: The user is in an Interview Arena solving: '{context or 'a coding problem'}'. "
-                        f"Rules: "
-                        f"1. NEVER write the full solution code. "
-                        f"2. Guide them with logic, pseudocode, or hints. "
-                        f"3. Be concise. "
-                        f"4. If the user says 'yes' or 'ready' to a success message, congratulate them and tell them to click the 'Next Challenge' button. "
-                        f"5. If they ask 'how to do task', explain the algorithmic approach to '{context}' without giving code. "
-                        f"6. If they ask to solve it, refuse politely citing 'Protocol Violation' and give a hint instead. "
-                        f"User Message: {message}"
-                    )
-                    response = self.model.generate_content(system_prompt)
+                    response = self.model.generate_content(self._build_prompt(message, context))
+                    self.reply_cache.put(context, message, response.text)
                     return response.text
                     
                 except ResourceExhausted:
-                    logger.warning("⚠️ Gemini Free Tier Limit Hit. Engaging 5-minute Circuit Breaker.")
-                    self.last_error_time = time.time() # STOP requests for 5 minutes
+                    self._trip_breaker()
                     # Fallback to rule-based logic
                     
                 except Exception as e:
                     logger.error(f"Gemini Gen Error: {e}")
                     # Fallthrough to rule-based on error
         
+        return self.rule_based_reply(message, context)
+
+    def _build_prompt(self, message: str, context: Optional[str]) -> str:
+        return (
+            f"You are Noor, an advanced AI Sentinel and Coding Mentor. "
+            f"Your Tone: Futuristic, Professional, Encouraging, slightly Sci-Fi (Cyberpunk). "
+            f"Context: The user is in an Interview Arena solving: '{context or 'a coding problem'}'. "
+            f"Rules: "
+            f"1. NEVER write the full solution code. "
+            f"2. Guide them with logic, pseudocode, or hints. "
+            f"3. Be concise. "
+            f"4. If the user says 'yes' or 'ready' to a success message, congratulate them and tell them to click the 'Next Challenge' button. "
+            f"5. If they ask 'how to do task', explain the algorithmic approach to '{context}' without giving code. "
+            f"6. If they ask to solve it, refuse politely citing 'Protocol Violation' and give a hint instead. "
+            f"User Message: {message}"
+        )
+
+    def _trip_breaker(self):
+        logger.warning("⚠️ Gemini Free Tier Limit Hit. Engaging 5-minute Circuit Breaker.")
+        self.last_error_time = time.time() # STOP requests for 5 minutes
+
+    def rule_based_reply(self, message: str, context: Optional[str] = None) -> str:
+        msg = message.lower().strip()
+        
         # 1. Direct Solution Requests (Cheating Prevention)
         if any(w in msg for w in ["solve", "answer", "code for me", "give me the code", "do it"]):
             return (
@@ -914,8 +1556,97 @@ class PersonaManager:
             f"I am standing by. Request a **HINT** if you are stuck, or **EXECUTE** your code to verify."
         )
 
+    async def aprocess_message(self, message: str, context: Optional[str] = None) -> str:
+        """Async variant for request handlers - the LLM path blocks for seconds."""
+        return await self.executor.run(self.process_message, message, context)
+
+    async def astream_message(self, message: str, context: Optional[str] = None):
+        """
+        Streaming variant: yields (text, source) as the reply is generated.
+
+        The blocking generate_content(stream=True) iterator is drained on the
+        generation executor and relayed through a queue, so the first chunk
+        reaches the client as soon as Gemini produces it. Quota errors surface
+        while iterating, so they trip the circuit breaker mid-stream too; if
+        nothing was sent yet the rule-based reply is yielded instead, otherwise
+        an interruption notice with source "llm_partial".
+        Rule-based and cached ("cache") replies are a single chunk.
+        """
+        if self.use_llm:
+            cached = self.reply_cache.get(context, message)
+            if cached is not None:
+                yield cached, "cache"
+                return
+        if not self.llm_available():
+            if self.use_llm:
+                logger.warning("❄️ Circuit Breaker Active. Streaming rule-based reply.")
+            yield self.rule_based_reply(message, context), "rules"
+            return
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        
+        def produce():
+            try:
+                for chunk in self.model.generate_content(self._build_prompt(message, context), stream=True):
+                    if cancelled.is_set():
+                        break  # client went away - stop pulling chunks
+                    if chunk.text:
+                        loop.call_soon_threadsafe(queue.put_nowait, ("chunk", chunk.text))
+            except ResourceExhausted:
+                self._trip_breaker()
+                loop.call_soon_threadsafe(queue.put_nowait, ("failed", None))
+            except Exception as e:
+                logger.error(f"Gemini Stream Error: {e}")
+                loop.call_soon_threadsafe(queue.put_nowait, ("failed", None))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, ("end", None))
+        
+        def producer_done(task: asyncio.Future):
+            # produce() reports its own errors; this covers the executor failing to run it at all
+            if not task.cancelled() and task.exception() is None:
+                return
+            if not task.cancelled():
+                logger.error(f"Gemini Stream Error: {task.exception()}")
+            queue.put_nowait(("failed", None))
+            queue.put_nowait(("end", None))
+        
+        producer = asyncio.ensure_future(self.executor.run(produce))
+        producer.add_done_callback(producer_done)
+        chunks = []
+        try:
+            while True:
+                kind, text = await queue.get()
+                if kind == "chunk":
+                    chunks.append(text)
+                    yield text, "llm"
+                elif kind == "failed":
+                    if chunks:
+                        yield "\n\n⚠️ **SIGNAL LOST**: Neural Link interrupted mid-transmission.", "llm_partial"
+                    else:
+                        yield self.rule_based_reply(message, context), "rules"
+                    return
+                elif kind == "end":
+                    # Only complete replies are cached
+                    if chunks:
+                        self.reply_cache.put(context, message, "".join(chunks))
+                    return
+        finally:
+            # The producer finishes on its own; this only stops it pulling chunks nobody will read
+            cancelled.set()
+
 persona = PersonaManager()
 
+def _generate_pool_question(difficulty: str, topic: str) -> Optional[Dict]:
+    """QuestionPool refill: one Gemini call; a quota error opens the persona's circuit breaker."""
+    try:
+        return interview_manager.generate_ai_question(difficulty, topic, persona.model)
+    except ResourceExhausted:
+        logger.warning("⚠️ Gemini Free Tier Limit Hit during question prefetch. Engaging Circuit Breaker.")
+        persona.last_error_time = time.time()
+        return None
+
 @app.post("/interview/chat")
 # force reload
 async def chat_with_interviewer(request: ChatRequest):
@@ -923,12 +1654,39 @@ async def chat_with_interviewer(request: ChatRequest):
     Enhanced chat with Hybrid Logic (Gemini LLM + Rule-Based Fallback)
     """
     try:
-        reply = persona.process_message(request.message, request.context)
+        reply = await persona.aprocess_message(request.message, request.context)
         return {"reply": reply}
     except Exception as e:
         logger.error(f"Chat error: {e}")
         return {"reply": "⚠️ **SYSTEM ERROR**: Neural Link Unstable. Please retry."}
 
+@app.post("/interview/chat/stream")
+async def stream_chat_with_interviewer(request: ChatRequest):
+    """
+    /interview/chat as Server-Sent Events: `data: {"delta": "..."}` per chunk as
+    Gemini generates it, then `data: {"done": true, "source": ...}` where source is
+    "llm", "llm_partial" (Gemini failed after some text was sent), "cache" (a stored
+    LLM reply) or "rules". Rule-based and cached replies arrive as a single delta.
+    """
+    async def events():
+        source = "rules"
+        try:
+            async for text, source in persona.astream_message(request.message, request.context):
+                yield f"data: {json.dumps({'delta': text})}\n\n"
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            if source == "llm":
+                source = "llm_partial"
+            yield f"data: {json.dumps({'delta': '⚠️ **SYSTEM ERROR**: Neural Link Unstable. Please retry.'})}\n\n"
+        yield f"data: {json.dumps({'done': True, 'source': source})}\n\n"
+    
+    # Not compressed (STREAMING_PATHS); no-cache/X-Accel-Buffering keep proxies from buffering events
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ===== MAIN ENTRY POINT =====
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,274 @@
+"""
+Check + micro-benchmark: static complexity analysis for /interview/evaluate.
+
+Runs labelled interview answers (binary search, slicing, sorting,
+recursion, ...) through ComplexityAnalyzer; any estimate that differs from
+its label exits non-zero. Then times ComplexityAnalyzer on submissions of growing size: a cold run
+(normalize + parse + one AST pass), the AST pass alone, a resubmission
+that differs only in whitespace and comments (normalized-hash hit) and an
+exact resubmission (raw-hash hit), up to the MAX_SOURCE_CHARS cap that
+/interview/evaluate enforces.
+
+At that cap the AST pass and both kinds of cache hit stay under 1 ms and
+are asserted to; a cold analysis (normalize + ast.parse) costs a few ms
+and is only reported - the endpoint runs it on the analyzer's executor,
+not on the event loop.
+
+    cd backend/ai-service && python benchmarks/bench_complexity.py
+"""
+import ast
+import itertools
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.complexity import MAX_SOURCE_CHARS, ComplexityAnalyzer  # noqa: E402
+
+# A typical interview solution: nested loops, list membership, string building, memoised recursion
+SOLUTION = '''
+def solve_{i}(nums, target):
+    seen = []
+    out = ""
+    for i in range(len(nums)):
+        for j in range(i + 1, len(nums)):
+            if nums[i] + nums[j] == target and nums[i] not in seen:
+                seen.append(nums[i])
+                out += str(nums[i])
+    return out
+
+
+def fib_{i}(n, memo={{}}):
+    if n in memo:
+        return memo[n]
+    if n < 2:
+        return n
+    memo[n] = fib_{i}(n - 1) + fib_{i}(n - 2)
+    return memo[n]
+'''
+
+
+# Labelled submissions: (name, code, expected big-o)
+CASES = [
+    ("constant", """
+def f(a):
+    return a[0] + 1
+""", "O(1)"),
+    ("linear loop", """
+def f(a):
+    t = 0
+    for x in a:
+        t += x
+    return t
+""", "O(n)"),
+    ("nested loops", """
+def f(a):
+    for x in a:
+        for y in a:
+            print(x, y)
+""", "O(n^2)"),
+    ("binary search", """
+def search(a, t):
+    lo, hi = 0, len(a) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if a[mid] == t:
+            return mid
+        if a[mid] < t:
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return -1
+""", "O(log n)"),
+    ("lower bound", """
+def lb(a, t):
+    lo, hi = 0, len(a)
+    while lo < hi:
+        mid = lo + (hi - lo) // 2
+        if a[mid] < t:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+""", "O(log n)"),
+    ("halving counter", """
+def bits(n):
+    c = 0
+    while n > 0:
+        c += n & 1
+        n //= 2
+    return c
+""", "O(log n)"),
+    ("doubling counter", """
+def f(n):
+    i = 1
+    while i < n:
+        i *= 2
+    return i
+""", "O(log n)"),
+    ("two pointers", """
+def f(a):
+    lo, hi = 0, len(a) - 1
+    while lo < hi:
+        lo += 1
+        hi -= 1
+    return lo
+""", "O(n)"),
+    ("binary search per item", """
+def f(a, qs):
+    out = []
+    for q in qs:
+        lo, hi = 0, len(a)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if a[mid] < q:
+                lo = mid + 1
+            else:
+                hi = mid
+        out.append(lo)
+    return out
+""", "O(n log n)"),
+    ("reverse slice", """
+def reverse_string(s):
+    return s[::-1]
+""", "O(n)"),
+    ("slice copy", """
+def tail(a):
+    rest = a[1:]
+    return rest
+""", "O(n)"),
+    ("sorted in slice", """
+def f(a):
+    return sorted(a)[::-1]
+""", "O(n log n)"),
+    ("sorted as slice bound", """
+def f(a, b):
+    return a[:sorted(b)[0]]
+""", "O(n log n)"),
+    ("fixed window", """
+def f(s):
+    out = []
+    for i in range(len(s)):
+        out.append(s[i:i + 3])
+    return out
+""", "O(n)"),
+    ("slice in loop", """
+def f(a):
+    for i in range(len(a)):
+        b = a[i:]
+    return b
+""", "O(n^2)"),
+    ("sum in loop", """
+def f(a):
+    out = []
+    for x in a:
+        out.append(sum(a))
+    return out
+""", "O(n^2)"),
+    ("max of two", """
+def f(a):
+    best = 0
+    for x in a:
+        best = max(best, x)
+    return best
+""", "O(n)"),
+    ("list membership in loop", """
+def f(a):
+    seen = []
+    for x in a:
+        if x in seen:
+            return True
+        seen.append(x)
+    return False
+""", "O(n^2)"),
+    ("naive fib", """
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+""", "O(2^n)"),
+    ("memo fib", """
+from functools import lru_cache
+@lru_cache(None)
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+""", "O(n)"),
+    ("merge sort", """
+def ms(a):
+    if len(a) <= 1:
+        return a
+    mid = len(a) // 2
+    l, r = ms(a[:mid]), ms(a[mid:])
+    out = []
+    i = j = 0
+    while i < len(l) and j < len(r):
+        if l[i] < r[j]:
+            out.append(l[i]); i += 1
+        else:
+            out.append(r[j]); j += 1
+    return out + l[i:] + r[j:]
+""", "O(n log n)"),
+]
+
+TARGET_MS = 1.0
+
+
+def make_submission(functions: int) -> str:
+    return "\n".join(SOLUTION.format(i=i) for i in range(functions))
+
+
+def timed(fn, repeat: int = 200) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check() -> List[str]:
+    failures = []
+    for name, code, expected in CASES:
+        got = ComplexityAnalyzer().analyze(code)["big_o"]
+        if got != expected:
+            failures.append(f"{name}: expected {expected}, got {got}")
+    print(f"{len(CASES) - len(failures)}/{len(CASES)} labelled submissions ok")
+    return failures
+
+
+def main():
+    failures = check()
+    largest = max(n for n in range(1, 100) if len(make_submission(n)) <= MAX_SOURCE_CHARS)
+    print(f"{'lines':>7} {'chars':>7} {'cold ms':>9} {'ast pass ms':>12} {'edit hit us':>12} {'exact hit us':>13}   big-o")
+    for functions in sorted({1, largest // 2, largest}):
+        code = make_submission(functions)
+        reformatted = code.replace("\n", "   \n")
+
+        cold = timed(lambda: ComplexityAnalyzer().analyze(code)) * 1000
+        tree = ast.parse(code)
+        visit = timed(lambda: ComplexityAnalyzer._analyze(tree)) * 1000
+
+        analyzer = ComplexityAnalyzer()
+        result = analyzer.analyze(code)
+        revisions = itertools.count()
+        edit = timed(lambda: analyzer.analyze(f"{reformatted}\n# revision {next(revisions)}")) * 1e6
+        exact = timed(lambda: analyzer.analyze(code)) * 1e6
+        assert analyzer.misses == 1, "whitespace/comment-only edits missed the cache"
+
+        print(f"{code.count(chr(10)) + 1:>7} {len(code):>7} {cold:>9.3f} {visit:>12.3f} {edit:>12.1f} "
+              f"{exact:>13.1f}   {result['big_o']}")
+        for name, ms in (("ast pass", visit), ("edit hit", edit / 1000), ("exact hit", exact / 1000)):
+            if ms >= TARGET_MS:
+                failures.append(f"{name} at {len(code)} chars took {ms:.3f} ms (target < {TARGET_MS} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Check + micro-benchmark: Noor's semantic reply cache.
+
+Replays labelled message pairs against SemanticResponseCache with the
+service's local embedder: after caching a reply for the first message of a
+pair, the second must hit (MUST_MATCH) or miss (MUST_NOT_MATCH). A wrong
+hit hands a student the answer to a different question, so any failure
+exits non-zero. Then times exact and semantic lookups.
+
+    cd backend/ai-service && python benchmarks/bench_reply_cache.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.local_embedding import HashingEmbedder  # noqa: E402
+from modules.semantic_cache import SemanticResponseCache  # noqa: E402
+
+CONTEXT = "Two Sum: find indices of two numbers that add up to target."
+
+MUST_MATCH = [
+    ("give me a hint", "can you give me a hint?"),
+    ("give me a hint", "Give me a hint please"),
+    ("explain the problem", "could you explain the problem?"),
+    ("I am stuck", "i am stuck!"),
+    ("what is the time complexity?", "what's the time complexity"),
+    ("any hints?", "any hint?"),
+]
+
+MUST_NOT_MATCH = [
+    ("what is the time complexity?", "what is the space complexity?"),
+    ("what if the input is empty?", "what if the input is negative?"),
+    ("is my solution correct?", "is my solution optimal?"),
+    ("give me a hint", "give me the answer"),
+    ("how do I use a hash map here?", "how do I use a heap here?"),
+    ("why does `for i in range(n)` time out?", "why does `for i in range(n * n)` time out?"),
+    ("is O(n) fine?", "is O(n^2) fine?"),
+    ("what does nums[i] + nums[j] == target mean?", "what does nums[i] - nums[j] == target mean?"),
+    ("should I sort the array first?", "should I reverse the array first?"),
+    ("what about duplicates?", "what about negatives?"),
+]
+
+
+def new_cache() -> SemanticResponseCache:
+    return SemanticResponseCache(HashingEmbedder().embed)
+
+
+def check() -> int:
+    failures = 0
+    for expected, pairs in ((True, MUST_MATCH), (False, MUST_NOT_MATCH)):
+        for first, second in pairs:
+            cache = new_cache()
+            cache.put(CONTEXT, first, "reply")
+            hit = cache.get(CONTEXT, second) is not None
+            if hit != expected:
+                failures += 1
+                print(f"FAIL  expected {'hit' if expected else 'miss'}: {first!r} -> {second!r}")
+    print(f"{len(MUST_MATCH) + len(MUST_NOT_MATCH) - failures}/{len(MUST_MATCH) + len(MUST_NOT_MATCH)} labelled pairs ok")
+    return failures
+
+
+def timed(fn, repeat: int = 2000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench():
+    cache = new_cache()
+    for first, _ in MUST_MATCH + MUST_NOT_MATCH:
+        cache.put(CONTEXT, first, "reply")
+    exact = timed(lambda: cache.get(CONTEXT, "give me a hint")) * 1e6
+    semantic = timed(lambda: cache.get(CONTEXT, "can you give me a hint?")) * 1e6
+    miss = timed(lambda: cache.get(CONTEXT, "what is the memory usage?")) * 1e6
+    print(f"exact hit {exact:.1f} us   semantic hit {semantic:.1f} us   miss {miss:.1f} us")
+
+
+if __name__ == "__main__":
+    failed = check()
+    bench()
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: skill extraction from repo names/descriptions.
+
+Compares the old per-keyword substring scan (O(repos x keywords)) with the
+compiled SkillTaxonomy matcher as the vocabulary grows.
+
+    cd backend/ai-service && python benchmarks/bench_skill_extraction.py
+"""
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.skill_taxonomy import DEFAULT_TAXONOMY_PATH, SkillTaxonomy  # noqa: E402
+
+WORDS = ("service api app tool library demo core bot data web server client cli "
+         "dashboard tracker engine platform plugin kit starter template example").split()
+
+
+def make_repos(count: int, skills, rng: random.Random):
+    repos = []
+    for i in range(count):
+        words = rng.sample(WORDS, 6) + rng.sample(skills, 2)
+        rng.shuffle(words)
+        repos.append({"name": f"{words[0]}-{words[1]}-{i}", "description": " ".join(words[2:])})
+    return repos
+
+
+def synthetic_skills(count: int, rng: random.Random):
+    return [
+        {"name": "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))),
+         "aliases": ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))]}
+        for _ in range(count)
+    ]
+
+
+def legacy_extract(repos, keywords):
+    skills = set()
+    for repo in repos:
+        repo_text = f"{repo.get('name', '')} {repo.get('description', '')}".lower()
+        for keyword in keywords:
+            if keyword in repo_text:
+                skills.add(keyword)
+    return skills
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = random.Random(0)
+    with open(DEFAULT_TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        base_skills = json.load(f)["skills"]
+    repos_count = 100  # one user's worth of repos
+
+    print(f"{'vocabulary':>12} {'forms':>7} {'compile ms':>11} {'legacy ms':>10} {'taxonomy ms':>12}")
+    for extra in (0, 2000, 10000):
+        skills = base_skills + synthetic_skills(extra, rng)
+        start = time.perf_counter()
+        taxonomy = SkillTaxonomy(skills)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        forms = list(taxonomy.canonical)
+        repos = make_repos(repos_count, [s["name"] for s in skills], rng)
+        texts = [f"{r['name']} {r['description']}" for r in repos]
+
+        legacy = timed(lambda: legacy_extract(repos, forms)) * 1000
+        compiled = timed(lambda: taxonomy.extract_many(texts)) * 1000
+        print(f"{len(taxonomy):>12} {len(forms):>7} {compile_ms:>11.1f} {legacy:>10.2f} {compiled:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
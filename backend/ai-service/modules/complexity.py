@@ -0,0 +1,546 @@
+import ast
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from modules.upstream_executor import UpstreamExecutor
+
+logger = logging.getLogger(__name__)
+
+# Largest submission /interview/evaluate accepts (~180 lines): keeps the AST pass under 1 ms (benchmarks/bench_complexity.py)
+MAX_SOURCE_CHARS = 4000
+
+# Decorators that turn plain recursion into memoised recursion
+MEMO_DECORATORS = {"lru_cache", "cache"}
+# Methods that scan the whole list - O(n) per call
+LINEAR_LIST_METHODS = {"index", "count", "remove"}
+SORT_CALLS = {"sorted"}
+# Builtins that consume their whole (single) argument - O(n) per call; max(a, b) is not
+LINEAR_BUILTINS = {"sum", "min", "max", "any", "all", "list", "set", "tuple", "dict", "frozenset"}
+
+# Cost of a code site: (polynomial degree, has log factor, is exponential)
+Cost = Tuple[int, bool, bool]
+
+# Nodes with nothing underneath that can change the estimate - a third of a typical tree is Load/Store
+_LEAVES = (
+    ast.Name, ast.Constant, ast.expr_context, ast.operator, ast.unaryop, ast.cmpop, ast.boolop,
+    ast.alias, ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal, ast.Pass, ast.Break, ast.Continue,
+)
+
+
+def _concrete(classes) -> Set[type]:
+    found = set()
+    for cls in classes:
+        found.add(cls)
+        found |= _concrete(cls.__subclasses__())
+    return found
+
+
+_LEAF_CLASSES = frozenset(_concrete(_LEAVES))
+# Fields that never hold child nodes
+_SCALAR_FIELDS = {"ctx", "op", "id", "attr", "arg", "name", "names", "module", "level", "kind",
+                  "type_comment", "conversion", "is_async", "simple", "kwd_attrs", "rest"}
+_CHILD_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def normalize_code(code: str) -> str:
+    """
+    Drop trailing whitespace, comment-only lines and trailing blank lines, so
+    those edits share a cache key. Line count is preserved, so line numbers
+    in the analysis still match the submission.
+    """
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").split("\n")]
+    return "\n".join(["" if line.lstrip()[:1] == "#" else line for line in lines]).rstrip("\n")
+
+
+def format_big_o(cost: Cost) -> str:
+    degree, log, exponential = cost
+    if exponential:
+        return "O(2^n)"
+    if degree == 0:
+        return "O(log n)" if log else "O(1)"
+    poly = "n" if degree == 1 else f"n^{degree}"
+    return f"O({poly} log n)" if log else f"O({poly})"
+
+
+class _FunctionScope:
+    __slots__ = ("name", "recursive_calls", "halving_calls", "decrement_calls", "memoized",
+                 "membership_tests", "subscript_stores", "cost")
+
+    def __init__(self, name: str, memoized: bool):
+        self.name = name
+        self.recursive_calls = 0
+        self.halving_calls = 0  # f(arr[:mid]), f(n // 2): divide and conquer
+        self.decrement_calls = 0  # f(n - 1), f(n - 2): one level per unit of n
+        self.memoized = memoized
+        self.membership_tests: Set[str] = set()  # `key in memo`
+        self.subscript_stores: Set[str] = set()  # `memo[key] = ...`
+        self.cost: Cost = (0, False, False)
+
+
+class _ComplexityVisitor(ast.NodeVisitor):
+    """
+    One walk over the tree: loop depth, recursion, memoisation and linear-inside-loop patterns.
+
+    visit/generic_visit are specialised versions of NodeVisitor's: handlers
+    are looked up by node class in a table built once, leaves are skipped,
+    and only fields that can hold nodes are read (about 3x faster).
+    """
+
+    _handlers: Dict[type, Callable] = {}
+
+    def __init__(self):
+        self.depth = 0
+        self.log_depth = 0  # enclosing loops whose variable halves or doubles each pass
+        self.max_depth = 0
+        self.loops = 0
+        self.functions: List[_FunctionScope] = []
+        self.finished: List[_FunctionScope] = []
+        self.list_names: Set[str] = set()
+        self.str_names: Set[str] = set()
+        self.patterns: List[Dict] = []
+        self.cost: Cost = (0, False, False)
+
+    # ----- traversal -----
+
+    def visit(self, node: ast.AST):
+        handler = self._handlers.get(node.__class__)
+        if handler is not None:
+            handler(self, node)
+        elif node.__class__ not in _LEAF_CLASSES:
+            self.generic_visit(node)
+
+    def generic_visit(self, node: ast.AST):
+        cls = node.__class__
+        fields = _CHILD_FIELDS.get(cls)
+        if fields is None:
+            # getattr: match-statement fields can hold plain values (MatchSingleton.value)
+            fields = _CHILD_FIELDS[cls] = tuple(f for f in getattr(cls, "_fields", ()) if f not in _SCALAR_FIELDS)
+        visit = self.visit
+        for field in fields:
+            value = getattr(node, field, None)
+            if value.__class__ is list:
+                for item in value:
+                    # None (Dict.keys for **spread) is not a leaf class either, so check it explicitly
+                    if item is not None and item.__class__ not in _LEAF_CLASSES:
+                        visit(item)
+            elif value is not None and value.__class__ not in _LEAF_CLASSES:
+                visit(value)
+
+    # ----- bookkeeping -----
+
+    @property
+    def in_loop(self) -> bool:
+        return bool(self.depth or self.log_depth)
+
+    def _charge(self, cost: Cost):
+        if self.log_depth:
+            cost = (cost[0], True, cost[2])
+        self.cost = max(self.cost, cost, key=_rank)
+        if self.functions:
+            scope = self.functions[-1]
+            scope.cost = max(scope.cost, cost, key=_rank)
+
+    def _flag(self, node: ast.AST, pattern: str):
+        self.patterns.append({"line": node.lineno, "pattern": pattern})
+        self._charge((self.depth + 1, False, False))
+
+    def _loop(self, node: ast.AST, children: List[ast.AST]):
+        self.loops += 1
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        self._charge((self.depth, False, False))
+        for child in children:
+            self.visit(child)
+        self.depth -= 1
+
+    # ----- loops -----
+
+    def visit_For(self, node: ast.For):
+        self.visit(node.iter)  # the iterable is evaluated once, outside the loop body
+        self._loop(node, [node.target, *node.body, *node.orelse])
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node: ast.While):
+        if not _is_halving_loop(node):
+            self._loop(node, [node.test, *node.body, *node.orelse])
+            return
+        # Binary search, `n //= 2`, `i *= 2`: log n passes
+        self.loops += 1
+        self.log_depth += 1
+        self._charge((self.depth, True, False))
+        for child in (node.test, *node.body, *node.orelse):
+            self.visit(child)
+        self.log_depth -= 1
+
+    def _comprehension(self, node: ast.AST, elements: List[ast.AST]):
+        outer = self.depth
+        for generator in node.generators:
+            self.visit(generator.iter)
+            self.loops += 1
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            self._charge((self.depth, False, False))
+            for condition in generator.ifs:
+                self.visit(condition)
+        for element in elements:
+            self.visit(element)
+        self.depth = outer
+
+    def visit_ListComp(self, node: ast.ListComp):
+        self._comprehension(node, [node.elt])
+
+    visit_SetComp = visit_ListComp
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node: ast.DictComp):
+        self._comprehension(node, [node.key, node.value])
+
+    # ----- functions and recursion -----
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        memoized = any(_callable_name(d) in MEMO_DECORATORS for d in node.decorator_list)
+        scope = _FunctionScope(node.name, memoized)
+        self.functions.append(scope)
+        # a def's body runs when called, not per enclosing iteration
+        outer_depth, outer_log_depth, self.depth, self.log_depth = self.depth, self.log_depth, 0, 0
+        for statement in node.body:
+            self.visit(statement)
+        self.depth, self.log_depth = outer_depth, outer_log_depth
+        self.functions.pop()
+
+        if scope.membership_tests & scope.subscript_stores:
+            scope.memoized = True
+        if scope.recursive_calls:
+            degree, log, exponential = scope.cost
+            if scope.halving_calls == scope.recursive_calls:
+                # log n levels of the body's work: binary search O(log n), merge sort O(n log n)
+                self._charge((degree, True, exponential))
+            elif scope.decrement_calls > 1 and not scope.memoized:
+                # fib(n - 1) + fib(n - 2): the call tree doubles per level
+                self._charge((0, False, True))
+            else:
+                # n distinct calls (tree nodes, memoised states), each doing the body's work
+                self._charge((degree + 1, log, exponential))
+        self.finished.append(scope)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call):
+        name = _callable_name(node.func)
+        if self.functions and name is not None:
+            for scope in self.functions:
+                if scope.name == name:
+                    scope.recursive_calls += 1
+                    if any(_is_halving(arg) for arg in node.args):
+                        scope.halving_calls += 1
+                    elif any(_is_decrement(arg) for arg in node.args):
+                        scope.decrement_calls += 1
+        if isinstance(node.func, ast.Attribute):
+            receiver = node.func.value
+            method = node.func.attr
+            if self.in_loop and isinstance(receiver, ast.Name) and receiver.id in self.list_names:
+                if method in LINEAR_LIST_METHODS:
+                    self._flag(node, f"list.{method}() inside a loop is O(n) per call")
+                elif method == "insert" and node.args and _is_zero(node.args[0]):
+                    self._flag(node, "list.insert(0, ...) inside a loop shifts every element - use collections.deque")
+                elif method == "pop" and node.args and _is_zero(node.args[0]):
+                    self._flag(node, "list.pop(0) inside a loop shifts every element - use collections.deque")
+            if method == "sort":
+                self._charge((self.depth + 1, True, False))
+            elif method == "join" and len(node.args) == 1:
+                self._charge((self.depth + 1, False, False))
+        elif name in SORT_CALLS:
+            self._charge((self.depth + 1, True, False))
+        elif name in LINEAR_BUILTINS and len(node.args) == 1:
+            self._charge((self.depth + 1, False, False))
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        if isinstance(node.slice, ast.Slice) and not _is_bounded_slice(node.slice):
+            self._charge((self.depth + 1, False, False))  # s[::-1], a[1:]: the slice copies O(n) items
+        self.generic_visit(node)
+
+    # ----- quadratic patterns -----
+
+    def visit_Compare(self, node: ast.Compare):
+        for op, right in zip(node.ops, node.comparators):
+            if not isinstance(op, (ast.In, ast.NotIn)):
+                continue
+            if isinstance(right, ast.Name) and self.functions:
+                self.functions[-1].membership_tests.add(right.id)
+            if self.in_loop and (
+                isinstance(right, (ast.List, ast.ListComp))
+                or (isinstance(right, ast.Name) and right.id in self.list_names)
+            ):
+                self._flag(node, "membership test on a list inside a loop is O(n) - use a set")
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        if (
+            self.in_loop
+            and isinstance(node.op, ast.Add)
+            and isinstance(node.target, ast.Name)
+            and node.target.id in self.str_names
+        ):
+            self._flag(node, "string concatenation inside a loop copies the string each time - use ''.join()")
+        self.generic_visit(node)
+
+    def visit_Assign(self, node: ast.Assign):
+        kind = _value_kind(node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                if target.id in self.str_names and _is_concat(node.value, target.id):
+                    kind = "str"  # still a string, rebuilt from itself
+                    if self.in_loop:
+                        self._flag(node, "string concatenation inside a loop copies the string each time - use ''.join()")
+                self.list_names.discard(target.id)
+                self.str_names.discard(target.id)
+                if kind == "list":
+                    self.list_names.add(target.id)
+                elif kind == "str":
+                    self.str_names.add(target.id)
+            elif isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name) and self.functions:
+                self.functions[-1].subscript_stores.add(target.value.id)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        if isinstance(node.target, ast.Name) and node.value is not None:
+            kind = _value_kind(node.value)
+            if kind == "list":
+                self.list_names.add(node.target.id)
+            elif kind == "str":
+                self.str_names.add(node.target.id)
+        self.generic_visit(node)
+
+
+_ComplexityVisitor._handlers = {
+    getattr(ast, name[len("visit_"):]): method
+    for name, method in vars(_ComplexityVisitor).items()
+    if name.startswith("visit_") and hasattr(ast, name[len("visit_"):])
+}
+
+
+def _rank(cost: Cost) -> Tuple[bool, int, bool]:
+    degree, log, exponential = cost
+    return exponential, degree, log
+
+
+def _callable_name(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr  # functools.lru_cache, self.solve
+    return None
+
+
+def _is_zero(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and node.value == 0
+
+
+def _is_halving(node: ast.AST) -> bool:
+    for child in ast.walk(node):
+        if isinstance(child, ast.Subscript) and isinstance(child.slice, ast.Slice):
+            return True
+        if isinstance(child, ast.BinOp) and isinstance(child.op, (ast.FloorDiv, ast.RShift)):
+            return True
+        if isinstance(child, ast.Name) and "mid" in child.id.lower():
+            return True
+    return False
+
+
+def _is_bounded_slice(node: ast.Slice) -> bool:
+    """a[:3], a[1:4], a[-2:], a[i:i + k] - a fixed-size copy, not O(n)."""
+    lower, upper = node.lower, node.upper
+    if upper is None:
+        return isinstance(lower, ast.UnaryOp) and isinstance(lower.op, ast.USub) and isinstance(lower.operand, ast.Constant)
+    if isinstance(upper, ast.Constant):
+        return lower is None or isinstance(lower, ast.Constant)
+    if isinstance(upper, ast.BinOp) and isinstance(upper.op, ast.Add) and lower is not None:
+        return ast.dump(upper.left) == ast.dump(lower)
+    return False
+
+
+_SCALING_OPS = (ast.FloorDiv, ast.RShift, ast.Div, ast.Mult, ast.LShift)
+
+
+def _scales(node: ast.AST) -> bool:
+    """(lo + hi) // 2, n >> 1, i * 2: divides or multiplies by a constant."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.BinOp) and isinstance(child.op, _SCALING_OPS) and isinstance(child.right, ast.Constant):
+            return True
+    return False
+
+
+def _loop_body_nodes(statements: List[ast.stmt]):
+    """Nodes of a loop body, not descending into nested loops or definitions."""
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While, ast.FunctionDef, ast.AsyncFunctionDef,
+                             ast.Lambda, ast.ClassDef)):
+            continue
+        stack.extend(ast.iter_child_nodes(node))
+
+
+def _is_halving_loop(node: ast.While) -> bool:
+    """
+    A while loop whose tested variable halves or doubles each pass:
+    `mid = (lo + hi) // 2 ... lo = mid + 1`, `n //= 2`, `i *= 2`.
+    """
+    tested = {child.id for child in ast.walk(node.test) if isinstance(child, ast.Name)}
+    if not tested:
+        return False
+    scaled: Set[str] = set()
+    derived: List[Tuple[Set[str], Set[str]]] = []  # (assigned names, names they are computed from)
+    for child in _loop_body_nodes(node.body):
+        if isinstance(child, ast.AugAssign) and isinstance(child.target, ast.Name):
+            if isinstance(child.op, _SCALING_OPS) and isinstance(child.value, ast.Constant):
+                scaled.add(child.target.id)
+        elif isinstance(child, ast.Assign):
+            targets = {
+                name.id for target in child.targets for name in ast.walk(target) if isinstance(name, ast.Name)
+            }
+            if _scales(child.value):
+                scaled |= targets
+            else:
+                derived.append((targets, {n.id for n in ast.walk(child.value) if isinstance(n, ast.Name)}))
+    # lo = mid + 1: a bound moved to the midpoint shrinks the range by half as well
+    for targets, sources in derived:
+        if sources & scaled:
+            scaled |= targets
+    return bool(tested & scaled)
+
+
+def _is_decrement(node: ast.AST) -> bool:
+    return isinstance(node, ast.BinOp) and isinstance(node.op, ast.Sub) and isinstance(node.right, ast.Constant)
+
+
+def _is_concat(node: ast.AST, name: str) -> bool:
+    """s + x or x + s"""
+    return isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add) and any(
+        isinstance(side, ast.Name) and side.id == name for side in (node.left, node.right)
+    )
+
+
+def _value_kind(node: ast.AST) -> Optional[str]:
+    if isinstance(node, (ast.List, ast.ListComp)):
+        return "list"
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "list":
+        return "list"
+    if isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+        return "str"
+    return None
+
+
+class ComplexityAnalyzer:
+    """
+    Static time-complexity estimate for a Python submission.
+
+    A single AST pass records loop nesting (comprehensions included),
+    recursion (branching vs. linear), memoisation (@lru_cache/@cache or a
+    `key in memo` / `memo[key] = ...` dict) and linear operations inside
+    loops (`in list`, list.index/count/remove, pop(0)/insert(0), str +=).
+    Slice copies (`s[::-1]`, `a[1:]`), sorts and whole-iterable builtins
+    (sum(a), set(a), "".join(a)) are linear or n log n wherever they run.
+    A while loop whose tested variable halves or doubles each pass (binary
+    search, `n //= 2`, `i *= 2`) is charged log n instead of n. Each site is
+    charged n^(loop depth), +1 degree for a linear operation, and the most
+    expensive site gives the estimated Big-O.
+
+    Results are cached by a hash of the normalized source, so resubmitting
+    the same code with different whitespace or comments skips the parse.
+    The raw source hash is cached too: an exact resubmission - the common
+    case - costs one sha1 and a dict lookup.
+
+    From async code use `aanalyze`: an exact resubmission is answered
+    inline via `cached`, anything else is parsed on a small executor so a
+    cold analysis (a few ms at MAX_SOURCE_CHARS) never runs on the loop.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.executor = UpstreamExecutor("complexity", max_workers=2)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _raw_key(code: str) -> str:
+        return "raw:" + hashlib.sha1(code.encode("utf-8")).hexdigest()
+
+    def cached(self, code: str) -> Optional[Dict]:
+        """The stored result for this exact source, or None - never parses."""
+        return self._lookup(self._raw_key(code))
+
+    async def aanalyze(self, code: str) -> Dict:
+        """analyze() that only leaves the event loop on a cache miss."""
+        cached = self.cached(code)
+        if cached is not None:
+            return cached
+        return await self.executor.run(self.analyze, code)
+
+    def analyze(self, code: str) -> Dict:
+        """Raises SyntaxError for code that does not parse (not cached)."""
+        raw_key = self._raw_key(code)
+        cached = self._lookup(raw_key)
+        if cached is not None:
+            return cached
+
+        normalized = normalize_code(code)
+        key = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        cached = self._lookup(key)
+        if cached is None:
+            cached = self._analyze(ast.parse(normalized))
+            with self._lock:
+                self.misses += 1
+            self._store(key, cached)
+        self._store(raw_key, cached)
+        return cached
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            return cached
+
+    def _store(self, key: str, result: Dict):
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _analyze(tree: ast.AST) -> Dict:
+        visitor = _ComplexityVisitor()
+        visitor.visit(tree)
+        scopes = visitor.finished
+        return {
+            "big_o": format_big_o(visitor.cost),
+            "max_loop_depth": visitor.max_depth,
+            "loops": visitor.loops,
+            "recursive_functions": [s.name for s in scopes if s.recursive_calls],
+            "memoized_functions": [s.name for s in scopes if s.recursive_calls and s.memoized],
+            "quadratic_patterns": visitor.patterns,
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching dispatcher in front of EmbeddingGenerator.
+
+    Concurrent callers enqueue their texts; the queue is flushed after
+    `window_ms` or as soon as `max_batch_size` texts are waiting. Each flush
+    deduplicates identical texts, makes ONE upstream call (one rate-limit
+    slot) for the whole batch and fans the rows back out to the waiting
+    callers.
+    """
+
+    def __init__(self, generator, window_ms: float = 5.0, max_batch_size: int = 100):
+        self.generator = generator
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = set()
+
+        self.batches = 0
+        self.texts = 0
+        self.deduplicated = 0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embedding for a single text (1-D)."""
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for several texts (N x D); they ride in the same batch."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+        self._pending.extend(zip(texts, futures))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        rows = await asyncio.gather(*futures)
+        return np.vstack(rows)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for i in range(0, len(pending), self.max_batch_size):
+            task = asyncio.create_task(self._dispatch(pending[i:i + self.max_batch_size]))
+            # Keep a reference so the task is not garbage-collected mid-flight
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        positions: Dict[str, int] = {}
+        for text, _ in batch:
+            positions.setdefault(text, len(positions))
+        unique = list(positions)
+
+        self.batches += 1
+        self.texts += len(batch)
+        self.deduplicated += len(batch) - len(unique)
+
+        try:
+            matrix = await self.generator.agenerate_embedding(unique)
+        except Exception as e:
+            logger.error(f"Batched embedding failed ({len(unique)} texts): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future in batch:
+            if not future.done():  # caller may have been cancelled
+                future.set_result(matrix[positions[text]])
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "texts": self.texts,
+            "deduplicated": self.deduplicated,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "queued": len(self._pending),
+        }
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import fcntl  # POSIX only - used to serialise appends between uvicorn workers
+except ImportError:  # pragma: no cover - Windows dev machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model_name: str, task_type: str, text: str) -> str:
+    """
+    Content address for an embedding.
+    Text is case-folded and whitespace-collapsed so trivially different
+    spellings of the same skill string share one entry.
+    """
+    normalized = " ".join(text.casefold().split())
+    payload = f"{model_name}\x1f{task_type}\x1f{normalized}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only on-disk embedding store.
+
+    Layout inside `directory`:
+        meta.json    -> {"dim": 768, "dtype": "float32"}
+        vectors.f32  -> memory-mapped float32 matrix (capacity x dim)
+        keys.txt     -> one cache key per line, line N describes row N
+
+    A vector is always written before its key line, so a key visible in
+    keys.txt always points at a complete row. Several processes can share
+    the same directory: appends are serialised with an exclusive flock and
+    every process picks up rows written by the others on its next miss.
+    """
+
+    def __init__(self, directory: str, initial_capacity: int = 1024):
+        self.directory = directory
+        self.initial_capacity = initial_capacity
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.txt")
+
+        self.dim: Optional[int] = None
+        self.index: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._keys_offset_rows = 0
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = int(json.load(f)["dim"])
+            self._sync_index()
+            logger.info(f"Embedding disk cache loaded: {len(self.index)} vectors (dim={self.dim})")
+        except Exception as e:
+            logger.error(f"Embedding disk cache unreadable, starting empty: {e}")
+            self.dim = None
+            self.index = {}
+            self._keys_offset = 0
+            self._keys_offset_rows = 0
+
+    def _capacity_on_disk(self) -> int:
+        if not self.dim or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (self.dim * 4)
+
+    def _remap(self):
+        """(Re)open the memmap so it covers the whole vectors file."""
+        capacity = self._capacity_on_disk()
+        self._matrix = None
+        if capacity > 0:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _sync_index(self):
+        """Read key lines appended since our last look (by us or another worker)."""
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            chunk = f.read()
+        # Only consume complete lines - a concurrent writer may be mid-append
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return
+        capacity = self._capacity_on_disk()
+        row = self._keys_offset_rows
+        for line in chunk[:end].split(b"\n"):
+            if row >= capacity:
+                break  # key without a backing row (torn write) - ignore the tail
+            self.index.setdefault(line.decode("ascii"), row)
+            row += 1
+        self._keys_offset_rows = row
+        self._keys_offset += end + 1
+        if self._matrix is None or self._matrix.shape[0] < capacity:
+            self._remap()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self.index.get(key)
+            if row is None and self.dim is not None:
+                self._sync_index()
+                row = self.index.get(key)
+            if row is None or self._matrix is None:
+                return None
+            return np.array(self._matrix[row], dtype=np.float32)
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        with self._lock:
+            if key in self.index:
+                return
+            if self.dim is None:
+                self._init_store(vector.size)
+            if vector.size != self.dim:
+                logger.warning(f"Embedding disk cache: dim mismatch ({vector.size} != {self.dim}), not storing")
+                return
+
+            with open(self.keys_path, "ab") as keys_file:
+                if fcntl:
+                    fcntl.flock(keys_file, fcntl.LOCK_EX)
+                try:
+                    # Another worker may have appended since we last looked
+                    self._sync_index()
+                    if key in self.index:
+                        return
+                    row = self._keys_offset_rows
+                    if row >= self._capacity_on_disk():
+                        self._grow(row + 1)
+                    elif self._matrix is None or self._matrix.shape[0] <= row:
+                        self._remap()  # file was grown by another worker
+                    self._matrix[row] = vector
+                    keys_file.write(key.encode("ascii") + b"\n")
+                    keys_file.flush()
+                    self.index[key] = row
+                    self._keys_offset_rows = row + 1
+                    self._keys_offset = keys_file.tell()
+                finally:
+                    if fcntl:
+                        fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def _init_store(self, dim: int):
+        self.dim = dim
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "dtype": "float32"}, f)
+        if not os.path.exists(self.vectors_path):
+            self._grow(self.initial_capacity)
+        else:
+            self._remap()
+
+    def _grow(self, min_rows: int):
+        """Double the backing file until it holds at least `min_rows` rows."""
+        capacity = max(self._capacity_on_disk(), self.initial_capacity)
+        while capacity < min_rows:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._remap()
+
+    def flush(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache.
+    Tier 1: in-process LRU bounded by total vector bytes.
+    Tier 2: optional DiskEmbeddingStore that survives restarts.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_memory_bytes: int = 64 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.disk: Optional[DiskEmbeddingStore] = None
+        if directory:
+            try:
+                self.disk = DiskEmbeddingStore(directory)
+            except OSError as e:
+                logger.error(f"Embedding disk cache disabled ({directory}): {e}")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+
+        vector = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, vector)
+            return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, vector)
+            except OSError as e:
+                logger.error(f"Embedding disk cache write failed: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the LRU and evict oldest entries until under the byte budget."""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self.disk) if self.disk is not None else 0,
+            }
+
+    def flush(self):
+        if self.disk is not None:
+            self.disk.flush()
@@ -3,50 +3,60 @@ import os
 import time
 import google.generativeai as genai
 import numpy as np
-from typing import List, Union
+from typing import List, Optional, Union
 from google.api_core import exceptions as google_exceptions
 
+from modules.embedding_cache import EmbeddingCache, make_cache_key
+from modules.local_embedding import HashingEmbedder
+from modules.rate_limiter import RateLimiter
+from modules.upstream_executor import UpstreamExecutor
+
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
+class EmbeddingGenerator:
     """
-    Robust Token Bucket-style Rate Limiter for Gemini Free Tier.
-    Limits: 15 Requests Per Minute (RPM) -> 1 req / 4 seconds.
+    Generate embeddings using Google Gemini API with robust error handling.
+    EMBEDDING_ENGINE=local switches to the offline HashingEmbedder (no network, no quota).
     """
-    def __init__(self, requests_per_minute=10): # Safe buffer (10 < 15)
-        self.period = 60.0 / requests_per_minute
-        self.last_request_time = 0
-
-    def wait_for_token(self):
-        """Blocks until a token is available to ensure we don't hit 429s."""
-        now = time.time()
-        time_since_last = now - self.last_request_time
-        
-        if time_since_last < self.period:
-            sleep_time = self.period - time_since_last
-            logger.info(f"Rate Limiter: Throttling for {sleep_time:.2f}s")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
-
-class EmbeddingGenerator:
-    """Generate embeddings using Google Gemini API with robust error handling"""
     
-    def __init__(self, model_name: str = 'models/text-embedding-004'):
+    def __init__(self, model_name: str = 'models/text-embedding-004', task_type: str = "semantic_similarity", engine: str = None):
         self.model_name = model_name
+        self.task_type = task_type
+        self.model = None
+        self.engine = (engine or os.getenv("EMBEDDING_ENGINE", "gemini")).lower()
+        # Deterministic offline engine: primary when engine == "local", fallback otherwise
+        self.local_engine = HashingEmbedder(dim=int(os.getenv("LOCAL_EMBEDDING_DIM", "768")))
         self.api_key = os.getenv("GEMINI_API_KEY")
-        # Initialize Rate Limiter with strict safety margin
-        self.rate_limiter = RateLimiter(requests_per_minute=10)
+        # Initialize Rate Limiter with strict safety margin (shared by all workers on this host)
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=float(os.getenv("GEMINI_EMBED_RPM", "10")),
+            burst=float(os.getenv("GEMINI_EMBED_BURST", "3")),
+            item_cost=float(os.getenv("GEMINI_EMBED_ITEM_COST", "0.02")),
+            state_path=os.getenv("GEMINI_RATE_LIMIT_FILE", os.path.join("cache", "rate_limits", "gemini_embed.bucket"))
+        )
+        # Content-addressed cache: repeat skill strings never reach Gemini twice
+        self.cache = EmbeddingCache(
+            directory=os.getenv("EMBEDDING_CACHE_DIR", os.path.join("cache", "embeddings")),
+            max_memory_bytes=int(os.getenv("EMBEDDING_CACHE_MEMORY_MB", "64")) * 1024 * 1024
+        )
+        # Blocking Gemini calls run here, never on the event loop
+        self.executor = UpstreamExecutor("embedding", max_workers=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4")))
         
-        if not self.api_key:
+        if self.engine == "local":
+            logger.info("Embedding engine: local hashing (offline mode)")
+        elif not self.api_key:
             logger.error("CRITICAL: GEMINI_API_KEY not found! AI features will be disabled.")
         else:
             genai.configure(api_key=self.api_key)
 
     def load_model(self):
         """Compatibility method - checks connection."""
+        if self.engine == "local":
+            self.model = self.local_engine.model_name
+            return
         if not self.api_key:
             return
+        self.model = self.model_name
         logger.info(f"Gemini API Configured. Model: {self.model_name}")
 
     def _normalize(self, embedding: np.ndarray) -> np.ndarray:
@@ -66,26 +76,65 @@ class EmbeddingGenerator:
 
     def generate_embedding(self, text: Union[str, List[str]], retries=3) -> np.ndarray:
         """
-        Generate embedding with Rate Limiting, Retries, and Normalization.
+        Generate embedding with Caching, Rate Limiting, Retries, and Normalization.
+        Only texts missing from the cache are sent upstream (in one call).
+        """
+        texts = text if isinstance(text, list) else [text]
+        if self.engine == "local":
+            # Hashing is cheaper than a cache lookup - no cache, limiter or retries
+            matrix = self.local_engine.embed(texts)
+            return matrix if isinstance(text, list) else matrix[0]
+
+        keys = [make_cache_key(self.model_name, self.task_type, t) for t in texts]
+        rows = [self.cache.get(key) for key in keys]
+
+        # Deduplicate misses so a repeated text is only embedded once
+        pending = {}
+        for i, row in enumerate(rows):
+            if row is None:
+                pending.setdefault(keys[i], []).append(i)
+
+        if pending:
+            first_index = [indices[0] for indices in pending.values()]
+            fresh, is_real = self._embed_upstream([texts[i] for i in first_index], retries)
+            for (key, indices), vector in zip(pending.items(), fresh):
+                if is_real:
+                    # Never persist fallback vectors - they would poison the Gemini cache
+                    self.cache.put(key, vector)
+                for i in indices:
+                    rows[i] = vector
+
+        if isinstance(text, list):
+            return np.vstack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+        return rows[0]
+
+    async def agenerate_embedding(self, text: Union[str, List[str]], retries=3) -> np.ndarray:
+        """Async variant for request handlers - runs generate_embedding on the bounded executor."""
+        return await self.executor.run(self.generate_embedding, text, retries)
+
+    def _embed_upstream(self, texts: List[str], retries=3):
+        """
+        Call Gemini for a list of texts.
+        Returns (matrix of normalized float32 rows, is_real) - is_real is False for local fallbacks.
         """
         if not self.api_key:
-            logger.warning("No API Key - Using Mock Embeddings")
-            return self._get_mock_embedding(len(text) if isinstance(text, list) else 1)
+            logger.warning("No API Key - Using local hashing embeddings")
+            return self.local_engine.embed(texts), False
 
         for attempt in range(retries):
             try:
-                self.rate_limiter.wait_for_token()
+                self.rate_limiter.wait_for_token(self.rate_limiter.cost_for(len(texts)))
                 
                 # Call Google Gemini API
                 result = genai.embed_content(
                     model=self.model_name,
-                    content=text,
-                    task_type="semantic_similarity"
+                    content=texts,
+                    task_type=self.task_type
                 )
                 
                 # Extract and Normalize
-                raw_embedding = np.array(result['embedding'])
-                return self._normalize(raw_embedding)
+                raw_embedding = np.array(result['embedding'], dtype=np.float32).reshape(len(texts), -1)
+                return self._normalize(raw_embedding), True
 
             except google_exceptions.ResourceExhausted:
                 wait_time = (attempt + 1) * 5 # Exponential backoff: 5s, 10s, 15s
@@ -97,8 +146,26 @@ class EmbeddingGenerator:
                     break # Give up after retries
         
         # Fallback if all retries fail
-        logger.error("All retries failed. Returning MOCK embedding to keep service alive.")
-        return self._get_mock_embedding(len(text) if isinstance(text, list) else 1)
+        logger.error("All retries failed. Returning local hashing embedding to keep service alive.")
+        return self.local_engine.embed(texts), False
+
+    @staticmethod
+    def canonical_skill(skill: str) -> str:
+        """Canonical atom for per-skill composition ("  React " -> "react")"""
+        return " ".join(skill.casefold().split())
+
+    def compose_skill_set(self, atom_embeddings: np.ndarray, weights: Optional[List[float]] = None) -> np.ndarray:
+        """
+        Skill-set embedding as the (weighted) mean of per-skill embeddings, L2-normalized.
+        Order-independent, so ["react", "node"] == ["node", "react"].
+        """
+        atoms = np.asarray(atom_embeddings, dtype=np.float32).reshape(len(atom_embeddings), -1)
+        if weights is None:
+            pooled = atoms.mean(axis=0)
+        else:
+            w = np.clip(np.asarray(weights, dtype=np.float32), 0.0, None)
+            pooled = (w @ atoms) / w.sum() if w.sum() > 0 else atoms.mean(axis=0)
+        return self._normalize(pooled)
 
     def batch_generate_embeddings(self, texts: List[str], batch_size: int = 10) -> np.ndarray:
         """Batch generation wrapper (Gemini handles batching natively to some extent)"""
@@ -111,10 +178,3 @@ class EmbeddingGenerator:
             return float(np.dot(embedding1, embedding2) / (np.linalg.norm(embedding1) * np.linalg.norm(embedding2)))
         except Exception:
             return 0.0
-
-    def _get_mock_embedding(self, count=1):
-        # Gemini embeddings are 768 dim usually
-        dim = 768
-        if count == 1:
-            return np.random.rand(dim)
-        return np.random.rand(count, dim)
@@ -1,21 +1,202 @@
 import requests
 import logging
-from typing import Dict, List, Optional
+import numpy as np
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 from collections import Counter
 from datetime import datetime, timezone
 
+from modules.github_state import GitHubStateStore
+from modules.http_cache import ConditionalResponseCache, credential_identity
+from modules.language_cache import RepoLanguageCache
+from modules.skill_taxonomy import SkillTaxonomy
+from modules.upstream_executor import UpstreamExecutor
+
 logger = logging.getLogger(__name__)
 
+# Incremental re-analysis pages this many repos at a time, so a walk that meets an unchanged repo
+# on page 1 has transferred 10 repos instead of 100
+INCREMENTAL_PAGE_SIZE = 10
+
+# Only the fields the analysis reads; repositories mirror REST /users/{u}/repos (public, owned, recently updated first)
+GRAPHQL_USER_QUERY = """
+query($login: String!, $first: Int!) {
+  user(login: $login) {
+    login
+    name
+    bio
+    company
+    location
+    avatarUrl
+    url
+    followers { totalCount }
+    following { totalCount }
+    publicRepos: repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }
+    repositories(first: $first, privacy: PUBLIC, ownerAffiliations: OWNER,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      nodes {
+        name
+        nameWithOwner
+        isFork
+        pushedAt
+        updatedAt
+        description
+        primaryLanguage { name }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+        languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
+          edges { size node { name } }
+        }
+      }
+    }
+  }
+}
+"""
+
 class GitHubAnalyzer:
     """Analyze GitHub profiles to extract skills and technologies"""
     
-    def __init__(self):
-        self.base_url = "https://api.github.com"
+    def __init__(
+        self,
+        max_workers: int = 8,
+        pool_size: int = 16,
+        timeout: float = 15.0,
+        http_cache_dir: Optional[str] = None,
+        fetch_mode: str = "rest",
+        base_url: str = "https://api.github.com",
+        graphql_url: Optional[str] = None,
+        state_dir: Optional[str] = None,
+        full_refresh_interval: float = 24 * 3600,
+        taxonomy: Optional[SkillTaxonomy] = None,
+        language_mode: str = "primary",
+        language_cache_dir: Optional[str] = None,
+        http_cache_memory_mb: int = 16,
+        http_cache_disk_mb: int = 256
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.graphql_url = graphql_url or f"{self.base_url}/graphql"
+        # "graphql": profile + repos + language sizes in one POST (needs a token; REST otherwise)
+        self.fetch_mode = fetch_mode
+        self.timeout = timeout
         self.session = requests.Session()
         self.session.headers.update({
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'OrbitDev-AI-Service'
         })
+        # Bounded keep-alive pool per host, sized for the concurrent fetches below
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Fetch engine: profile and repo pages are requested in parallel
+        self.fetch_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="github-fetch")
+        # Whole analyses run here so request handlers never block the event loop
+        self.executor = UpstreamExecutor("github", max_workers=4)
+        # ETag / Last-Modified cache - 304 revalidations are free against the rate limit
+        self.http_cache = ConditionalResponseCache(
+            http_cache_dir,
+            max_memory_bytes=http_cache_memory_mb * 1024 * 1024,
+            max_disk_bytes=http_cache_disk_mb * 1024 * 1024
+        )
+        # Last per-user snapshot: re-analysis only fetches repos updated since then.
+        # A periodic full fetch picks up deleted/renamed repos, which incremental runs cannot see.
+        self.state_store = GitHubStateStore(state_dir)
+        self.full_refresh_interval = full_refresh_interval
+        # Compiled skill matcher used by _extract_skills
+        self.taxonomy = taxonomy or SkillTaxonomy.load()
+        # "primary": one language per repo. "bytes": each repo split across its languages by byte share
+        self.language_mode = language_mode
+        self.language_cache = RepoLanguageCache(language_cache_dir)
+        # Latest X-RateLimit-* headers per (credential identity, resource): each token - and the
+        # anonymous per-IP quota - is its own budget, so a batch only backs off on the one it spends
+        self._rate_limits: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._rate_limit_lock = threading.Lock()
+    
+    def _get_json(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        access_token: Optional[str] = None,
+        conditional: bool = True
+    ) -> Tuple[Any, Dict]:
+        """
+        Conditional GET with per-request credentials. Returns (body, links).
+        The shared session is never mutated, so concurrent users never see each other's token.
+        A stored ETag/Last-Modified is sent along; on 304 the stored body is served.
+        conditional=False skips the HTTP cache (for callers that cache the result themselves).
+        """
+        key = self.http_cache.make_key(url, params, access_token)
+        entry = self.http_cache.lookup(key) if conditional else None
+        
+        headers = self.http_cache.conditional_headers(entry)
+        if access_token:
+            headers['Authorization'] = f'token {access_token}'
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        self._record_rate_limit(response, access_token)
+        
+        if response.status_code == 304 and entry is not None:
+            self.http_cache.record_revalidated(key)
+            return entry['body'], entry.get('links', {})
+        
+        response.raise_for_status()
+        body = response.json()
+        links = {rel: {'url': link.get('url')} for rel, link in response.links.items()}
+        if conditional:
+            self.http_cache.store(
+                key, url, body,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                links=links
+            )
+        return body, links
+    
+    def _record_rate_limit(self, response: requests.Response, access_token: Optional[str] = None):
+        """Remember the quota reported in X-RateLimit-Remaining / X-RateLimit-Reset for this credential"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset = int(remaining), float(reset)
+        except ValueError:
+            return
+        key = (credential_identity(access_token), response.headers.get('X-RateLimit-Resource', 'core'))
+        with self._rate_limit_lock:
+            # Responses complete out of order: within one window keep the lowest count,
+            # a later reset means a new window has started
+            current = self._rate_limits.get(key)
+            if current is None or reset > current[1] or (reset == current[1] and remaining < current[0]):
+                self._rate_limits[key] = (remaining, reset)
+            if len(self._rate_limits) > 1024:
+                # Forget windows that are over - those credentials have their full quota back
+                now = time.time()
+                for stale in [k for k, (_, window_reset) in self._rate_limits.items() if window_reset <= now]:
+                    del self._rate_limits[stale]
+    
+    def rate_limit_pause(self, low_watermark: int, access_token: Optional[str] = None) -> float:
+        """
+        Seconds to hold off new analyses made with this credential: 0 unless one of
+        its quotas is at or below low_watermark. Other tokens are not affected.
+        """
+        identity = credential_identity(access_token)
+        now = time.time()
+        with self._rate_limit_lock:
+            pauses = [
+                reset - now
+                for (owner, _), (remaining, reset) in self._rate_limits.items()
+                if owner == identity and remaining <= low_watermark
+            ]
+        return max([0.0] + pauses)
+    
+    def rate_limit_stats(self) -> Dict:
+        """Quota per credential identity (a hash, never the token) and resource"""
+        with self._rate_limit_lock:
+            stats: Dict[str, Dict] = {}
+            for (identity, resource), (remaining, reset) in self._rate_limits.items():
+                stats.setdefault(identity, {})[resource] = {'remaining': remaining, 'reset_at': reset}
+            return stats
     
     def analyze_user(self, username: str, access_token: Optional[str] = None) -> Dict:
         """
@@ -29,14 +210,39 @@ class GitHubAnalyzer:
             Dictionary containing analysis results
         """
         try:
-            if access_token:
-                self.session.headers['Authorization'] = f'token {access_token}'
+            state = self.state_store.load(username)
+            full_refresh_at = time.time()
+            incremental = False
             
-            # Fetch user profile
-            profile = self._fetch_user_profile(username)
+            if self.fetch_mode == "graphql" and access_token:
+                # One round-trip, only the fields we read
+                profile, repos = self._fetch_user_graphql(username, access_token)
+                changed = repos
+            else:
+                # Fetch user profile in the background while repositories are paged in
+                profile_future = self.fetch_pool.submit(self._fetch_user_profile, username, access_token)
+                
+                incremental = state is not None and time.time() - state.get('full_refresh_at', 0) < self.full_refresh_interval
+                try:
+                    if incremental:
+                        # Only repos updated since the last run; everything else comes from the snapshot
+                        changed = self._list_repos(username, access_token=access_token, since=self.state_store.watermark(state))
+                        repos = self._merge_repos(state['repos'], changed)
+                        full_refresh_at = state['full_refresh_at']
+                    else:
+                        repos = changed = self._list_repos(username, access_token=access_token)
+                except requests.RequestException as e:
+                    logger.error(f"Error fetching repos for {username}: {e}")
+                    profile = profile_future.result()
+                    if state is not None:
+                        # Serve the stored snapshot (decay re-applied) rather than an empty profile
+                        return {**self.rescore_user(username, state), 'profile': profile}
+                    repos, changed = [], None
+                
+                profile = profile_future.result()
             
-            # Fetch repositories
-            repos = self._fetch_user_repos(username)
+            if self.language_mode == "bytes":
+                repos = self._fetch_language_bytes(repos, access_token)
             
             # Analyze languages
             languages = self._analyze_languages(repos)
@@ -44,6 +250,10 @@ class GitHubAnalyzer:
             # Extract skills from repos
             skills = self._extract_skills(repos, languages)
             
+            if changed is not None:
+                self.state_store.record_run(incremental, len(changed))
+                self.state_store.save(username, profile, repos, full_refresh_at)
+            
             return {
                 'username': username,
                 'profile': profile,
@@ -56,47 +266,200 @@ class GitHubAnalyzer:
             logger.error(f"Error analyzing user {username}: {e}")
             raise
     
-    def _fetch_user_profile(self, username: str) -> Dict:
+    def rescore_user(self, username: str, state: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Rebuild the analysis from the stored snapshot without touching the network.
+        Time decay is re-applied against the current date. None when nothing is stored.
+        """
+        state = state or self.state_store.load(username)
+        if state is None:
+            return None
+        repos = self._merge_repos(state.get('repos', {}), [])
+        languages = self._analyze_languages(repos)
+        return {
+            'username': username,
+            'profile': state.get('profile'),
+            'repo_count': len(repos),
+            'languages': languages,
+            'skills': self._extract_skills(repos, languages),
+            'analysis_complete': True
+        }
+    
+    @staticmethod
+    def _merge_repos(snapshot: Dict[str, Dict], changed: List[Dict], max_repos: int = 100) -> List[Dict]:
+        """Overlay changed repos on the stored snapshot; newest-updated first, capped like a full fetch"""
+        merged = dict(snapshot)
+        for repo in changed:
+            merged[GitHubStateStore.repo_key(repo)] = GitHubStateStore.snapshot(repo)
+        return sorted(merged.values(), key=lambda repo: repo.get('updated_at') or '', reverse=True)[:max_repos]
+    
+    async def aanalyze_user(self, username: str, access_token: Optional[str] = None) -> Dict:
+        """Async variant for request handlers - runs analyze_user on the bounded executor"""
+        return await self.executor.run(self.analyze_user, username, access_token)
+    
+    def _fetch_user_profile(self, username: str, access_token: Optional[str] = None) -> Dict:
         """Fetch user profile information"""
         try:
-            response = self.session.get(f"{self.base_url}/users/{username}")
-            response.raise_for_status()
-            return response.json()
+            profile, _ = self._get_json(f"{self.base_url}/users/{username}", access_token=access_token)
+            return profile
         except requests.RequestException as e:
             logger.error(f"Error fetching profile for {username}: {e}")
             raise
     
-    def _fetch_user_repos(self, username: str, max_repos: int = 100) -> List[Dict]:
-        """Fetch user's public repositories"""
+    def _fetch_user_repos(self, username: str, max_repos: int = 100, access_token: Optional[str] = None) -> List[Dict]:
+        """Fetch user's public repositories (empty list on failure)"""
         try:
-            repos = []
-            page = 1
-            
-            while len(repos) < max_repos:
-                response = self.session.get(
-                    f"{self.base_url}/users/{username}/repos",
-                    params={'sort': 'updated', 'per_page': 100, 'page': page}
-                )
-                response.raise_for_status()
-                
-                page_repos = response.json()
-                if not page_repos:
-                    break
-                
-                repos.extend(page_repos)
-                page += 1
-            
-            return repos[:max_repos]
+            return self._list_repos(username, max_repos, access_token)
         except requests.RequestException as e:
             logger.error(f"Error fetching repos for {username}: {e}")
             return []
     
+    def _list_repos(
+        self,
+        username: str,
+        max_repos: int = 100,
+        access_token: Optional[str] = None,
+        since: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Public repositories, most recently updated first; max_repos fits in one page (GitHub caps
+        per_page at 100), so a full fetch is a single request.
+        since: only repos with updated_at >= since - pages of INCREMENTAL_PAGE_SIZE are walked
+        in order and paging stops at the first older repo, so an unchanged profile costs one
+        small page rather than the full listing.
+        """
+        url = f"{self.base_url}/users/{username}/repos"
+        
+        def fetch_page(page: int, per_page: int) -> Tuple[Any, Dict]:
+            return self._get_json(
+                url,
+                params={'sort': 'updated', 'per_page': per_page, 'page': page},
+                access_token=access_token
+            )
+        
+        if since is not None:
+            changed = []
+            page = 1
+            while True:
+                page_repos, links = fetch_page(page, min(INCREMENTAL_PAGE_SIZE, max_repos))
+                fresh = [repo for repo in page_repos if (repo.get('updated_at') or '') >= since]
+                changed.extend(fresh)
+                if len(fresh) < len(page_repos) or page >= self._last_page(links) or len(changed) >= max_repos:
+                    return changed[:max_repos]
+                page += 1
+        
+        repos, _ = fetch_page(1, min(100, max_repos))
+        return list(repos)[:max_repos]
+    
+    def _fetch_user_graphql(self, username: str, access_token: str, max_repos: int = 100) -> Tuple[Dict, List[Dict]]:
+        """
+        Profile and up to 100 public repositories in a single GraphQL query.
+        Results are reshaped into the REST field names the analysis reads, so
+        everything downstream is unchanged. Each repo also carries
+        `language_bytes` ({language: bytes}) from the languages connection.
+        """
+        headers = {'Authorization': f'bearer {access_token}'}
+        payload = {
+            'query': GRAPHQL_USER_QUERY,
+            'variables': {'login': username, 'first': min(100, max_repos)}
+        }
+        response = self.session.post(self.graphql_url, json=payload, headers=headers, timeout=self.timeout)
+        self._record_rate_limit(response, access_token)
+        response.raise_for_status()
+        body = response.json()
+        
+        if body.get('errors'):
+            raise ValueError(f"GitHub GraphQL error for {username}: {body['errors'][0].get('message')}")
+        user = (body.get('data') or {}).get('user')
+        if user is None:
+            raise ValueError(f"GitHub user not found: {username}")
+        
+        profile = {
+            'login': user.get('login'),
+            'name': user.get('name'),
+            'bio': user.get('bio'),
+            'company': user.get('company'),
+            'location': user.get('location'),
+            'avatar_url': user.get('avatarUrl'),
+            'html_url': user.get('url'),
+            'public_repos': (user.get('publicRepos') or {}).get('totalCount', 0),
+            'followers': (user.get('followers') or {}).get('totalCount', 0),
+            'following': (user.get('following') or {}).get('totalCount', 0),
+        }
+        repos = [self._graphql_repo_to_rest(node) for node in (user.get('repositories') or {}).get('nodes') or []]
+        return profile, repos
+    
+    @staticmethod
+    def _graphql_repo_to_rest(node: Dict) -> Dict:
+        """Map a GraphQL repository node onto the REST repo fields used by the analysis"""
+        primary = node.get('primaryLanguage') or {}
+        topics = (node.get('repositoryTopics') or {}).get('nodes') or []
+        edges = (node.get('languages') or {}).get('edges') or []
+        return {
+            'name': node.get('name'),
+            'full_name': node.get('nameWithOwner'),
+            'fork': node.get('isFork', False),
+            'pushed_at': node.get('pushedAt'),
+            'updated_at': node.get('updatedAt'),
+            'description': node.get('description'),
+            'language': primary.get('name'),
+            'topics': [t['topic']['name'] for t in topics if t.get('topic')],
+            'language_bytes': {e['node']['name']: e.get('size', 0) for e in edges if e.get('node')},
+        }
+    
+    @staticmethod
+    def _last_page(links: Dict) -> int:
+        """Page count from GitHub's Link header (1 when there is no next page)"""
+        last = links.get('last', {}).get('url')
+        if not last:
+            return 1
+        try:
+            return int(parse_qs(urlparse(last).query).get('page', ['1'])[0])
+        except ValueError:
+            return 1
+    
+    def _fetch_language_bytes(self, repos: List[Dict], access_token: Optional[str] = None) -> List[Dict]:
+        """
+        Copies of `repos` with `language_bytes` ({language: bytes}) attached to every repo
+        that counts towards the language score. The input dicts may be shared HTTP cache
+        bodies, so they are never modified. Served from the (repo, pushed_at) cache when
+        possible; the rest are fetched from languages_url in parallel on the bounded fetch pool.
+        """
+        repos = [dict(repo) for repo in repos]
+        missing = []
+        for repo in repos:
+            if repo.get('fork', False) or not repo.get('pushed_at') or repo.get('language_bytes') is not None:
+                continue
+            cached = self.language_cache.get(GitHubStateStore.repo_key(repo), repo['pushed_at'])
+            if cached is not None:
+                repo['language_bytes'] = cached
+            elif repo.get('languages_url'):
+                missing.append(repo)
+        
+        def fetch(repo: Dict) -> Optional[Dict]:
+            try:
+                breakdown, _ = self._get_json(repo['languages_url'], access_token=access_token, conditional=False)
+                return breakdown
+            except requests.RequestException as e:
+                # Scored by its primary language instead
+                logger.warning(f"Error fetching languages for {repo.get('full_name')}: {e}")
+                return None
+        
+        for repo, breakdown in zip(missing, self.fetch_pool.map(fetch, missing)):
+            if breakdown is not None:
+                repo['language_bytes'] = breakdown
+                self.language_cache.put(GitHubStateStore.repo_key(repo), repo['pushed_at'], breakdown)
+        return repos
+    
     def _analyze_languages(self, repos: List[Dict]) -> List[Dict]:
         """
         Analyze programming languages with TRUTH ENGINE logic.
         1. Ignores Forks (Strictly).
         2. Applies Time Decay (Code > 1 year old is worth 10%).
         """
+        if self.language_mode == "bytes":
+            return self._analyze_language_bytes(repos)
+        
         language_map = {}
         now = datetime.now(timezone.utc)
         
@@ -147,6 +510,59 @@ class GitHubAnalyzer:
         
         return languages
     
+    def _analyze_language_bytes(self, repos: List[Dict]) -> List[Dict]:
+        """
+        Byte-weighted TRUTH ENGINE: same fork and time-decay rules, but each repo's
+        freshness score is split across its languages by byte share, so a
+        51% TypeScript / 49% Go repo counts for both. Repos without a byte
+        breakdown fall back to their primary language.
+        Scores come from one pass over a (repos x languages) matrix.
+        """
+        columns: Dict[str, int] = {}
+        pushed, rows, cols, sizes = [], [], [], []
+        for repo in repos:
+            if repo.get('fork', False) or not repo.get('pushed_at'):
+                continue
+            breakdown = repo.get('language_bytes') or ({repo['language']: 1} if repo.get('language') else {})
+            breakdown = {lang: size for lang, size in breakdown.items() if size > 0}
+            if not breakdown:
+                continue
+            try:
+                pushed_at = np.datetime64(repo['pushed_at'].replace('Z', ''), 's')
+            except ValueError:
+                continue
+            row = len(pushed)
+            pushed.append(pushed_at)
+            for lang, size in breakdown.items():
+                rows.append(row)
+                cols.append(columns.setdefault(lang, len(columns)))
+                sizes.append(size)
+        
+        if not columns:
+            return []
+        
+        matrix = np.zeros((len(pushed), len(columns)), dtype=np.float64)
+        matrix[rows, cols] = sizes
+        shares = matrix / matrix.sum(axis=1, keepdims=True)
+        
+        now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), 's')
+        days_since_push = (now - np.array(pushed)) // np.timedelta64(1, 'D')
+        recency_multiplier = np.maximum(0.1, 1.0 - days_since_push / 365)
+        
+        scores = recency_multiplier @ shares
+        total_score = scores.sum()
+        names = list(columns)
+        top = np.argsort(-scores, kind='stable')[:10]
+        
+        return [
+            {
+                'language': names[i],
+                'count': round(float(scores[i]), 2),
+                'percentage': round(float(scores[i] / total_score) * 100, 2) if total_score > 0 else 0
+            }
+            for i in top
+        ]
+    
     def _extract_skills(self, repos: List[Dict], languages: List[Dict]) -> List[str]:
         """Extract skills from repository data"""
         skills = set()
@@ -162,19 +578,9 @@ class GitHubAnalyzer:
                 topics = repo.get('topics', [])
                 skills.update(topics)
         
-        # Extract common framework indicators from repo names and descriptions
-        framework_keywords = {
-            'react', 'vue', 'angular', 'django', 'flask', 'express',
-            'spring', 'rails', 'laravel', 'nextjs', 'nuxt', 'gatsby',
-            'tensorflow', 'pytorch', 'keras', 'scikit-learn',
-            'docker', 'kubernetes', 'aws', 'azure', 'gcp',
-            'mongodb', 'postgresql', 'mysql', 'redis', 'elasticsearch'
-        }
-        
-        for repo in repos:
-            repo_text = f"{repo.get('name', '')} {repo.get('description', '')}".lower()
-            for keyword in framework_keywords:
-                if keyword in repo_text:
-                    skills.add(keyword)
+        # Framework/tool mentions in repo names and descriptions: one taxonomy scan over all repos
+        skills.update(self.taxonomy.extract_many(
+            f"{repo.get('name') or ''} {repo.get('description') or ''}" for repo in repos
+        ))
         
         return sorted(list(skills))
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Repo fields kept in a snapshot - everything the analysis reads, nothing else
+SNAPSHOT_FIELDS = (
+    'name', 'full_name', 'fork', 'pushed_at', 'updated_at',
+    'language', 'topics', 'description', 'languages_url', 'language_bytes'
+)
+
+
+class GitHubStateStore:
+    """
+    Per-user analysis state for incremental re-analysis.
+
+    One JSON file per user holds the profile and trimmed repo snapshot from
+    the last run and when that happened; language scores are recomputed
+    from the snapshot, so they are not stored. The repo with the newest `updated_at` acts as the watermark:
+    the next run only pages through repos updated since then.
+    """
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+        self.full_runs = 0
+        self.incremental_runs = 0
+        self.repos_refetched = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, username: str) -> str:
+        name = hashlib.sha256(username.lower().encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, username: str) -> Optional[Dict]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(username), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"GitHub state for {username} unreadable, doing a full fetch: {e}")
+            return None
+
+    def save(self, username: str, profile: Dict, repos: List[Dict], full_refresh_at: float):
+        if not self.directory:
+            return
+        state = {
+            "username": username,
+            "analyzed_at": time.time(),
+            "full_refresh_at": full_refresh_at,
+            "profile": profile,
+            "repos": {self.repo_key(repo): self.snapshot(repo) for repo in repos},
+        }
+        path = self._path(username)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"GitHub state write failed for {username}: {e}")
+
+    @staticmethod
+    def snapshot(repo: Dict) -> Dict:
+        return {field: repo[field] for field in SNAPSHOT_FIELDS if field in repo}
+
+    @staticmethod
+    def repo_key(repo: Dict) -> str:
+        return repo.get('full_name') or repo.get('name') or ''
+
+    @staticmethod
+    def watermark(state: Dict) -> str:
+        """Newest updated_at in the snapshot (GitHub ISO timestamps sort lexicographically)"""
+        return max((repo.get('updated_at') or '' for repo in state.get('repos', {}).values()), default='')
+
+    def record_run(self, incremental: bool, repos_fetched: int):
+        with self._lock:
+            if incremental:
+                self.incremental_runs += 1
+            else:
+                self.full_runs += 1
+            self.repos_refetched += repos_fetched
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "full_runs": self.full_runs,
+                "incremental_runs": self.incremental_runs,
+                "repos_refetched": self.repos_refetched,
+                "persistent": bool(self.directory),
+            }
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def credential_identity(credential: Optional[str]) -> str:
+    """Stable, non-reversible name for a token - what caches and quotas are keyed by, never the token itself."""
+    return hashlib.sha256(credential.encode("utf-8")).hexdigest()[:16] if credential else "anonymous"
+
+
+class ConditionalResponseCache:
+    """
+    Persistent HTTP response cache for conditional requests.
+
+    Stores each JSON body with its ETag / Last-Modified validators (and Link
+    header, needed for pagination). On refresh the caller sends
+    If-None-Match / If-Modified-Since; a 304 is then served from the stored
+    body. GitHub does not count 304s against the rate limit.
+
+    Keys include a hash of the credential, because the same URL can return
+    different data for different tokens (private repos).
+
+    Tier 1 is an in-process LRU bounded by the serialized size of its
+    entries (`max_memory_bytes`); entries larger than that are served from
+    disk only. Tier 2, `directory`, is bounded by `max_disk_bytes`: once
+    the files exceed it the least recently stored or revalidated ones are
+    deleted down to 80% of the budget.
+    """
+
+    def __init__(self, directory: Optional[str], max_memory_bytes: int = 16 * 1024 * 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Tuple[Dict, int]]" = OrderedDict()  # key -> (entry, serialized bytes)
+        self._memory_bytes = 0
+        self._disk_bytes = 0  # estimate between prunes - other workers write here too
+        self._lock = threading.Lock()
+
+        self.revalidated = 0  # 304 served from cache
+        self.refreshed = 0    # 200 stored/replaced
+        self.uncached = 0     # no stored entry to validate against
+        self.evictions = 0
+        self.disk_pruned = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None, credential: Optional[str] = None) -> str:
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params or {}))
+        return hashlib.sha256(f"{url}?{query}#{credential_identity(credential)}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached[0]
+        data = self._read(key) if self.directory else None
+        entry = None
+        if data is not None:
+            try:
+                entry = json.loads(data)
+            except ValueError as e:
+                logger.warning(f"HTTP cache entry unreadable ({key[:12]}): {e}")
+        with self._lock:
+            if entry is None:
+                self.uncached += 1
+            else:
+                self._remember(key, entry, len(data))
+        return entry
+
+    def _read(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"HTTP cache entry unreadable ({key[:12]}): {e}")
+            return None
+
+    def record_revalidated(self, key: str):
+        with self._lock:
+            self.revalidated += 1
+        if self.directory:
+            try:
+                os.utime(self._path(key))  # still in use - disk pruning goes by mtime
+            except OSError:
+                pass
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key: str, url: str, body: Any, etag: Optional[str], last_modified: Optional[str], links: Dict):
+        if not etag and not last_modified:
+            return  # nothing to validate against next time
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "links": links,
+            "body": body,
+            "stored_at": time.time(),
+        }
+        data = json.dumps(entry)
+        with self._lock:
+            self._remember(key, entry, len(data))
+            self.refreshed += 1
+        if self.directory:
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.error(f"HTTP cache write failed for {url}: {e}")
+                return
+            with self._lock:
+                self._disk_bytes += len(data)
+                over_budget = self._disk_bytes > self.max_disk_bytes
+            if over_budget:
+                self._prune_disk()
+
+    def _remember(self, key: str, entry: Dict, size: int):
+        """Insert into the LRU and evict oldest entries until under the byte budget."""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        if size > self.max_memory_bytes:
+            return  # would evict everything else - disk only
+        self._memory[key] = (entry, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+            self.evictions += 1
+
+    def _disk_files(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every stored entry."""
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue  # removed by another worker meanwhile
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logger.warning(f"HTTP cache directory unreadable: {e}")
+        return files
+
+    def _prune_disk(self):
+        """Delete the least recently used files until the directory is at 80% of max_disk_bytes."""
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.8
+        pruned = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already pruned by another worker
+            total -= size
+            pruned += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.disk_pruned += pruned
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "revalidated_304": self.revalidated,
+                "refreshed_200": self.refreshed,
+                "uncached": self.uncached,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / (1024 * 1024), 2),
+                "evictions": self.evictions,
+                "persistent": bool(self.directory),
+                "disk_mb": round(self._disk_bytes / (1024 * 1024), 2),
+                "disk_pruned": self.disk_pruned,
+            }
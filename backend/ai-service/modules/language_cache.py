@@ -0,0 +1,88 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RepoLanguageCache:
+    """
+    On-disk cache of per-repo language byte breakdowns (GET languages_url).
+
+    An entry is valid for as long as the repo's `pushed_at` is unchanged -
+    a repo's languages can only change with a push - so a hit costs no
+    request at all. One small JSON file per repo, overwritten when the repo
+    is pushed to; a bounded LRU sits in front of the files.
+    """
+
+    def __init__(self, directory: Optional[str], max_memory_entries: int = 4096):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, repo: str) -> str:
+        name = hashlib.sha256(repo.lower().encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.json")
+
+    def get(self, repo: str, pushed_at: str) -> Optional[Dict[str, int]]:
+        with self._lock:
+            entry = self._memory.get(repo)
+        if entry is None and self.directory:
+            try:
+                with open(self._path(repo), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                entry = None
+            except (OSError, ValueError) as e:
+                logger.warning(f"Language cache entry for {repo} unreadable: {e}")
+                entry = None
+
+        with self._lock:
+            if entry is None or entry.get("pushed_at") != pushed_at:
+                self.misses += 1
+                return None
+            self._remember(repo, entry)
+            self.hits += 1
+            return entry["languages"]
+
+    def put(self, repo: str, pushed_at: str, languages: Dict[str, int]):
+        entry = {"repo": repo, "pushed_at": pushed_at, "languages": languages}
+        with self._lock:
+            self._remember(repo, entry)
+        if self.directory:
+            path = self._path(repo)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error(f"Language cache write failed for {repo}: {e}")
+
+    def _remember(self, repo: str, entry: Dict):
+        self._memory[repo] = entry
+        self._memory.move_to_end(repo)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "persistent": bool(self.directory),
+            }
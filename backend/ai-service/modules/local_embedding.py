@@ -0,0 +1,67 @@
+import hashlib
+import logging
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keeps skill punctuation together: c++, c#, node.js, scikit-learn
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+
+@lru_cache(maxsize=65536)
+def _token_features(token: str, dim: int, ngram_range: Tuple[int, int]) -> Tuple[Tuple[int, float], ...]:
+    """
+    Signed hashed features for one token: the whole token plus its character
+    n-grams (with boundary markers). blake2b keeps hashes stable across
+    processes and restarts, unlike Python's salted hash().
+    """
+    features = [(token, 1.0)]
+    padded = f"<{token}>"
+    low, high = ngram_range
+    for n in range(low, high + 1):
+        features.extend((padded[i:i + n], 0.5) for i in range(len(padded) - n + 1))
+
+    hashed = []
+    for feature, weight in features:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        sign = 1.0 if digest & 1 else -1.0
+        hashed.append(((digest >> 1) % dim, sign * weight))
+    return tuple(hashed)
+
+
+class HashingEmbedder:
+    """
+    Deterministic, network-free embedding engine (feature hashing).
+
+    Each text is tokenized into skill tokens; every token contributes itself
+    plus its character n-grams, hashed into a fixed `dim` with a random sign.
+    Texts sharing tokens or sub-words ("react" / "react-native") land close
+    together, so cosine similarity stays meaningful. Same text -> same vector.
+    """
+
+    def __init__(self, dim: int = 768, ngram_range: Tuple[int, int] = (3, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.model_name = f"local/hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into an (N x dim) float32, L2-normalized matrix."""
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                for column, value in _token_features(token, self.dim, self.ngram_range):
+                    rows.append(row)
+                    columns.append(column)
+                    values.append(value)
+
+        # One scatter-add for the whole batch
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(columns, dtype=np.int64)
+        matrix = np.bincount(flat, weights=np.asarray(values, dtype=np.float64), minlength=len(texts) * self.dim)
+        matrix = matrix.reshape(len(texts), self.dim).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-10)
@@ -0,0 +1,351 @@
+import ast
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+REQUIRED_FIELDS = ("title", "description", "template", "test_case")
+
+PoolKey = Tuple[str, str]
+
+# Generated ids are uuid4 strings; anything else never reaches the filesystem
+_QUESTION_ID = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+
+def has_test_case(test_case: Optional[str]) -> bool:
+    """
+    False when `test_case` checks nothing - empty, `pass`, or only constants
+    such as `True` / `assert 1` - so any code that runs would "pass" it.
+    Unparseable test cases count as real: the sandbox reports the error.
+    """
+    try:
+        tree = ast.parse((test_case or "").strip())
+    except (SyntaxError, ValueError):
+        return True
+
+    def checks_nothing(node: ast.stmt) -> bool:
+        if isinstance(node, ast.Pass):
+            return True
+        if isinstance(node, ast.Expr):
+            return isinstance(node.value, ast.Constant)
+        if isinstance(node, ast.Assert):
+            return isinstance(node.test, ast.Constant)
+        return False
+
+    return not all(checks_nothing(node) for node in tree.body)
+
+
+def validate_question(question) -> bool:
+    """A generated question is usable only if every field is present, the code parses and the test checks something."""
+    if not isinstance(question, dict):
+        return False
+    if not all(isinstance(question.get(field), str) and question[field].strip() for field in REQUIRED_FIELDS):
+        return False
+    try:
+        ast.parse(question["template"])
+        ast.parse(question["test_case"])
+    except (SyntaxError, ValueError):
+        return False
+    return has_test_case(question["test_case"])
+
+
+class QuestionPool:
+    """
+    Pre-generated AI interview questions, one FIFO pool per (difficulty, topic).
+
+    Requests pop from a deque in O(1) and never wait on the LLM. A background
+    task tops every pool back up to `target_depth`, emptiest pool first. Each
+    generation first takes a token from `rate_limiter`, and refills pause
+    while `available()` is false (no API key, or the persona circuit
+    breaker is open). Only questions passing validate_question are kept; a
+    rejected generation is retried, up to `max_rejections` in a row per
+    pool and round.
+
+    Only the configured `topics` are pooled - a request for any other
+    topic is a miss and falls back, so arbitrary topics cannot grow the
+    pool set or spend generation quota.
+
+    Pools are saved to `directory` off the event loop, at most every
+    `save_interval` seconds during a refill round and once when it ends,
+    so they are warm after a restart. Pops are saved with the next refill
+    or at shutdown.
+
+    Every question handed out is also written to `directory`/served/<id>.json
+    (`remember`), so `find` resolves its test case in any worker and after
+    a restart; the newest `max_served` are kept, in memory and on disk.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, str], Optional[Dict]],
+        directory: Optional[str],
+        rate_limiter,
+        executor,
+        available: Callable[[], bool],
+        target_depth: int = 5,
+        topics: Iterable[str] = ("dsa",),
+        refill_interval: float = 30.0,
+        max_rejections: int = 3,
+        save_interval: float = 5.0,
+        max_served: int = 10000
+    ):
+        self.generate = generate
+        self.directory = directory
+        self.rate_limiter = rate_limiter
+        self.executor = executor
+        self.available = available
+        self.target_depth = target_depth
+        self.refill_interval = refill_interval
+        self.max_rejections = max_rejections
+        self.save_interval = save_interval
+        self.max_served = max_served
+
+        self._pools: Dict[PoolKey, Deque[Dict]] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._last_save = 0.0
+        self._served: "OrderedDict[str, Dict]" = OrderedDict()  # LRU over the served/ directory
+        self._served_writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.rejected = 0
+
+        for difficulty in DIFFICULTIES:
+            for topic in topics:
+                self._pools[self.make_key(difficulty, topic)] = deque()
+        if directory:
+            os.makedirs(self._served_dir(), exist_ok=True)
+            self.load()
+
+    @staticmethod
+    def make_key(difficulty: str, topic: str) -> PoolKey:
+        difficulty = (difficulty or "medium").strip().lower()
+        if difficulty not in DIFFICULTIES:
+            difficulty = "medium"
+        topic = " ".join((topic or "dsa").lower().split())[:40] or "dsa"
+        return difficulty, topic
+
+    # ----- serving -----
+
+    def pop(self, difficulty: str, topic: str) -> Optional[Dict]:
+        """Next pre-generated question for (difficulty, topic), or None when that pool is empty."""
+        key = self.make_key(difficulty, topic)
+        with self._lock:
+            pool = self._pools.get(key)  # None for topics that are not pooled
+            question = pool.popleft() if pool else None
+            if question is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._dirty = True
+        if self._wakeup is not None and pool is not None and len(pool) < self.target_depth:
+            self._wakeup.set()
+        return question
+
+    async def remember(self, question: Dict):
+        """Record a handed-out question so `find` can return it from any worker."""
+        with self._lock:
+            self._cache_served(question)
+        if self.directory and _QUESTION_ID.fullmatch(question.get("id") or ""):
+            await asyncio.to_thread(self._write_served, question)
+
+    async def find(self, question_id: str) -> Optional[Dict]:
+        """A question handed out by any worker sharing `directory`, or None."""
+        with self._lock:
+            question = self._served.get(question_id)
+            if question is not None:
+                self._served.move_to_end(question_id)
+                return question
+        if not self.directory or not _QUESTION_ID.fullmatch(question_id or ""):
+            return None
+        question = await asyncio.to_thread(self._read_served, question_id)
+        if question is not None:
+            with self._lock:
+                self._cache_served(question)
+        return question
+
+    def _cache_served(self, question: Dict):
+        self._served[question["id"]] = question
+        self._served.move_to_end(question["id"])
+        while len(self._served) > self.max_served:
+            self._served.popitem(last=False)
+
+    # ----- background refill -----
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._dirty:
+            await asyncio.to_thread(self.save)
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                await self.refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Question pool refill failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def refill(self):
+        """Top up every pool to target_depth (emptiest first) until budget or availability runs out."""
+        with self._lock:
+            keys = sorted(self._pools, key=lambda k: len(self._pools[k]))
+        try:
+            for key in keys:
+                rejections = 0
+                while rejections < self.max_rejections:
+                    with self._lock:
+                        if len(self._pools[key]) >= self.target_depth:
+                            break
+                    if not self.available():
+                        return
+                    await self.rate_limiter.acquire()
+                    question = await self.executor.run(self.generate, *key)
+                    if not validate_question(question) or self._has_title(key, question["title"]):
+                        self.rejected += 1
+                        rejections += 1
+                        continue
+                    rejections = 0
+                    question.setdefault("difficulty", key[0])
+                    question.setdefault("topic", key[1])
+                    with self._lock:
+                        self._pools[key].append(question)
+                        self.generated += 1
+                        self._dirty = True
+                    if time.monotonic() - self._last_save >= self.save_interval:
+                        await self._save_in_background()
+        finally:
+            if self._dirty:
+                await self._save_in_background()
+
+    async def _save_in_background(self):
+        self._last_save = time.monotonic()
+        await asyncio.to_thread(self.save)
+
+    def _has_title(self, key: PoolKey, title: str) -> bool:
+        with self._lock:
+            return any(q.get("title") == title for q in self._pools[key])
+
+    # ----- persistence -----
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, "questions.json")
+
+    def _served_dir(self) -> str:
+        return os.path.join(self.directory, "served")
+
+    def _write_served(self, question: Dict):
+        path = os.path.join(self._served_dir(), f"{question['id']}.json")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(question, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Served question write failed: {e}")
+            return
+        self._served_writes += 1
+        if self._served_writes % 100 == 0:
+            self._prune_served()
+
+    def _read_served(self, question_id: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self._served_dir(), f"{question_id}.json"), "r", encoding="utf-8") as f:
+                question = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Served question {question_id} unreadable: {e}")
+            return None
+        return question if isinstance(question, dict) and question.get("id") == question_id else None
+
+    def _prune_served(self):
+        """Drop the oldest served/ files beyond max_served."""
+        try:
+            with os.scandir(self._served_dir()) as entries:
+                files = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(".json")]
+        except OSError as e:
+            logger.warning(f"Served question pruning failed: {e}")
+            return
+        files.sort()
+        for _, path in files[:max(len(files) - self.max_served, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already pruned by another worker
+
+    def save(self):
+        if not self.directory:
+            return
+        with self._lock:
+            snapshot = {f"{d}|{t}": list(pool) for (d, t), pool in self._pools.items()}
+            self._dirty = False
+        tmp_path = f"{self._path()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self._path())
+        except OSError as e:
+            logger.error(f"Question pool save failed: {e}")
+
+    def load(self):
+        try:
+            with open(self._path(), "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Question pool snapshot unreadable, starting empty: {e}")
+            return
+        loaded = 0
+        with self._lock:
+            for name, questions in snapshot.items():
+                difficulty, _, topic = name.partition("|")
+                pool = self._pools.get(self.make_key(difficulty, topic))
+                if pool is None:  # topic no longer configured
+                    continue
+                valid = [q for q in questions if validate_question(q)]
+                pool.extend(valid)
+                loaded += len(valid)
+        logger.info(f"Question pool restored: {loaded} questions across {len(self._pools)} pools")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                "target_depth": self.target_depth,
+                "depths": {f"{d}|{t}": len(pool) for (d, t), pool in sorted(self._pools.items())},
+                "hits": self.hits,
+                "fallbacks": self.misses,
+                "hit_rate": round(self.hits / served, 4) if served else 0.0,
+                "generated": self.generated,
+                "rejected": self.rejected,
+                "served_cached": len(self._served),
+            }
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only - cross-process locking for the shared bucket file
+except ImportError:  # pragma: no cover - Windows dev machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# (tokens, updated_at) as two little-endian doubles
+_STATE = struct.Struct("<dd")
+
+BucketUpdate = Callable[[float, float], Tuple[float, float, float]]
+
+
+class LocalBucketState:
+    """Bucket state held in this process only."""
+
+    def __init__(self, capacity: float):
+        self._tokens = capacity
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def transact(self, update: BucketUpdate) -> float:
+        with self._lock:
+            self._tokens, self._updated_at, result = update(self._tokens, self._updated_at)
+            return result
+
+
+class FileBucketState:
+    """
+    Bucket state stored in a 16-byte file and updated under an exclusive flock,
+    so every uvicorn worker on the host draws from the same bucket.
+    """
+
+    def __init__(self, path: str, capacity: float):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()  # flock is per open file, not per thread
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Create without truncating - another worker may already own the state
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o644))
+
+    def transact(self, update: BucketUpdate) -> float:
+        with self._lock, open(self.path, "r+b") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                raw = f.read(_STATE.size)
+                if len(raw) == _STATE.size:
+                    tokens, updated_at = _STATE.unpack(raw)
+                else:
+                    tokens, updated_at = self.capacity, time.time()
+                tokens, updated_at, result = update(tokens, updated_at)
+                f.seek(0)
+                f.write(_STATE.pack(tokens, updated_at))
+                f.flush()
+                return result
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter for the Gemini free tier.
+
+    Refills at `requests_per_minute / 60` tokens per second up to `burst`.
+    A caller reserves `cost` tokens up front and then sleeps for however long
+    the bucket is in debt, so waiters are served in arrival order and nobody
+    polls. With `state_path` set the bucket lives in a shared file and all
+    workers on the host share one quota.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 10,  # Safe buffer (10 < 15)
+        burst: float = 1,
+        item_cost: float = 0.0,
+        state_path: Optional[str] = None,
+    ):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst)
+        self.item_cost = item_cost
+        self.total_wait = 0.0
+        self.throttled = 0
+
+        self.state = LocalBucketState(self.capacity)
+        if state_path:
+            try:
+                self.state = FileBucketState(state_path, self.capacity)
+            except OSError as e:
+                logger.error(f"Rate Limiter: shared state unavailable ({state_path}), using per-process bucket: {e}")
+
+    def cost_for(self, item_count: int) -> float:
+        """Weighted cost of one upstream call carrying `item_count` inputs."""
+        return 1.0 + max(item_count - 1, 0) * self.item_cost
+
+    def _reserve(self, cost: float) -> float:
+        """Take `cost` tokens (possibly going into debt) and return seconds to wait."""
+        def update(tokens: float, updated_at: float):
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(now - updated_at, 0.0) * self.rate)
+            tokens -= cost
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+            return tokens, now, wait
+
+        wait = self.state.transact(update)
+        if wait > 0:
+            self.throttled += 1
+            self.total_wait += wait
+            logger.info(f"Rate Limiter: Throttling for {wait:.2f}s (cost={cost:.2f})")
+        return wait
+
+    def wait_for_token(self, cost: float = 1.0):
+        """Blocks until `cost` tokens are available to ensure we don't hit 429s."""
+        wait = self._reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire(self, cost: float = 1.0):
+        """Async variant of wait_for_token - sleeps without blocking the event loop."""
+        if isinstance(self.state, FileBucketState):
+            # flock waits on other workers and the file IO can stall - keep both off the loop
+            wait = await asyncio.to_thread(self._reserve, cost)
+        else:
+            wait = self._reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict:
+        return {
+            "requests_per_minute": round(self.rate * 60, 2),
+            "burst": self.capacity,
+            "shared": isinstance(self.state, FileBucketState),
+            "throttled_calls": self.throttled,
+            "total_wait_seconds": round(self.total_wait, 2),
+        }
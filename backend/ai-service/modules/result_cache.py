@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResultCache:
+    """
+    TTL + stale-while-revalidate cache for expensive async computations.
+
+    fresh (age < ttl)              -> served from cache
+    stale (age < ttl + stale_ttl)  -> served from cache immediately, refreshed in the background
+    expired / missing              -> computed inline
+
+    Concurrent callers for the same key share one in-flight computation
+    (single-flight), whether it is an inline miss or a background refresh.
+    Failures are never cached.
+    """
+
+    def __init__(self, ttl: float = 600.0, stale_ttl: float = 3600.0, max_entries: int = 2048):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Return (value, status) where status is "fresh", "stale" or "miss"."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.fresh_hits += 1
+                return entry[1], "fresh"
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._start(key, compute)  # background refresh, nobody waits on it
+                return entry[1], "stale"
+
+        self.misses += 1
+        task = self._start(key, compute)
+        # shield: a cancelled caller must not cancel the shared computation
+        return await asyncio.shield(task), "miss"
+
+    def _start(self, key: str, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.create_task(self._run(key, compute))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved - background refresh failures are logged in _run
+
+    async def _run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Result cache: computation for {key} failed: {e}")
+            raise
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "hit_rate": round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,135 @@
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (skill name, level, gravity score)
+SkillEntry = Tuple[str, str, float]
+
+
+class RoleMatrix:
+    """
+    Role requirements compiled into skill x role matrices for batch scoring.
+
+    `required` / `optional` are 0/1 matrices over the union of all role
+    skills. A batch of users becomes one (users x skills) proficiency
+    matrix, so gap counts and fit scores for every user against every role
+    are a couple of matrix products.
+
+    Thresholds mirror /analyze-trajectory: a required skill below 0.6
+    (intermediate) is a gap - "learn" when absent, "improve" otherwise -
+    and an expert-level skill (>= 0.8) with gravity below 0.3 is drifting.
+    """
+
+    GAP_THRESHOLD = 0.6
+    DRIFT_PROFICIENCY = 0.8
+    DRIFT_GRAVITY = 0.3
+
+    def __init__(
+        self,
+        role_galaxy: Dict[str, Dict[str, List[str]]],
+        level_map: Dict[str, float],
+        default_level: float = 0.1,
+        resolve: Optional[Callable[[str], Optional[str]]] = None
+    ):
+        self.level_map = level_map
+        self.default_level = default_level
+        self.resolve = resolve
+
+        self.roles = list(role_galaxy)
+        skills = sorted({s for role in role_galaxy.values() for s in role["required"] + role["optional"]})
+        self.skill_index = {skill: i for i, skill in enumerate(skills)}
+
+        self.required = np.zeros((len(skills), len(self.roles)), dtype=np.float64)
+        self.optional = np.zeros_like(self.required)
+        for col, role in enumerate(role_galaxy.values()):
+            self.required[[self.skill_index[s] for s in role["required"]], col] = 1.0
+            if role["optional"]:
+                self.optional[[self.skill_index[s] for s in role["optional"]], col] = 1.0
+        self._required_sizes = np.maximum(self.required.sum(axis=0), 1.0)
+        self._optional_sizes = np.maximum(self.optional.sum(axis=0), 1.0)
+        # Users repeat the same few hundred skill spellings - resolve each once
+        self._column = lru_cache(maxsize=65536)(self._lookup_column)
+
+    def _lookup_column(self, name: str) -> Optional[int]:
+        name = name.lower()
+        col = self.skill_index.get(name)
+        if col is None and self.resolve is not None:
+            canonical = self.resolve(name)
+            col = self.skill_index.get(canonical) if canonical else None
+        return col
+
+    def analyze(self, users: Sequence[Sequence[SkillEntry]], top_roles: int = 3) -> List[Dict]:
+        """Score every user against every role in one pass. Returns one dict per user, in order."""
+        n_users = len(users)
+        proficiency = np.zeros((n_users, len(self.skill_index)), dtype=np.float64)
+        flat_user, flat_level, flat_gravity, flat_name = [], [], [], []
+
+        for u, skills in enumerate(users):
+            columns: Dict[int, float] = {}
+            for name, level, gravity in skills:
+                level_value = self.level_map.get(level.lower(), self.default_level)
+                flat_user.append(u)
+                flat_level.append(level_value)
+                flat_gravity.append(gravity)
+                flat_name.append(name)
+                col = self._column(name)
+                if col is not None:
+                    columns[col] = level_value  # last mention wins, as in the single-user endpoint
+            if columns:
+                proficiency[u, list(columns)] = list(columns.values())
+
+        flat_user = np.asarray(flat_user, dtype=np.int64)
+        flat_level = np.asarray(flat_level, dtype=np.float64)
+        flat_gravity = np.asarray(flat_gravity, dtype=np.float64)
+
+        # Physics: gravity index and drift, per user
+        skill_counts = np.bincount(flat_user, minlength=n_users)
+        total_gravity = np.bincount(flat_user, weights=flat_gravity, minlength=n_users)
+        drifting = (flat_level >= self.DRIFT_PROFICIENCY) & (flat_gravity < self.DRIFT_GRAVITY)
+        drift_counts = np.bincount(flat_user[drifting], minlength=n_users)
+
+        # Gaps and fit against every role
+        learn = (proficiency == 0) @ self.required
+        improve = ((proficiency > 0) & (proficiency < self.GAP_THRESHOLD)) @ self.required
+        gaps = learn + improve
+        required_coverage = proficiency @ self.required / self._required_sizes
+        optional_coverage = (proficiency > 0) @ self.optional / self._optional_sizes
+        fit = 0.8 * required_coverage + 0.2 * optional_coverage
+
+        # Best fit first; ties keep role order
+        ranked = np.argsort(-fit, axis=1, kind="stable")[:, :top_roles]
+        best = ranked[:, 0] if len(self.roles) else np.zeros(n_users, dtype=np.int64)
+        best_gaps = gaps[np.arange(n_users), best]
+        trajectory = np.where(
+            drift_counts > 0, "drifting",
+            np.where(best_gaps == 0, "stable",
+                     np.where(total_gravity > skill_counts * 0.5, "accelerating", "stable"))
+        )
+        gravity_index = np.round(total_gravity / np.maximum(skill_counts, 1), 2)
+
+        drifting_skills: List[List[str]] = [[] for _ in range(n_users)]
+        for i in np.flatnonzero(drifting):
+            drifting_skills[flat_user[i]].append(flat_name[i])
+
+        return [
+            {
+                "trajectory": str(trajectory[u]),
+                "gravity_index": float(gravity_index[u]),
+                "drifting_skills": drifting_skills[u],
+                "best_fit_roles": [
+                    {
+                        "role": self.roles[r],
+                        "fit_score": round(float(fit[u, r]), 4),
+                        "learn": int(learn[u, r]),
+                        "improve": int(improve[u, r]),
+                    }
+                    for r in ranked[u]
+                ],
+                "gap_counts": {role: int(gaps[u, r]) for r, role in enumerate(self.roles)},
+            }
+            for u in range(n_users)
+        ]
@@ -0,0 +1,95 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Seniority and generic job nouns carry no signal about *which* role is meant
+_NOISE_WORDS = {
+    "senior", "sr", "junior", "jr", "staff", "principal", "lead", "head", "chief", "intern",
+    "i", "ii", "iii", "iv", "of", "the", "and", "a",
+    "engineer", "engineering", "developer", "dev", "programmer", "architect", "specialist",
+}
+_SEPARATORS = re.compile(r"[\s\-_/&,.()|]+")
+
+
+class RoleResolver:
+    """
+    Maps free-form job titles ("ML Engineer", "SRE") onto known roles.
+
+    Every role name and alias is embedded once at startup into a small
+    (forms x dim) matrix. A title is resolved by exact match first, then by
+    nearest-neighbour cosine similarity against that matrix; below
+    `min_confidence` the default role is used. Seniority and generic words
+    ("Senior", "Engineer", "Developer") are stripped from both sides first.
+    Results are cached per distinct (normalized) title, so repeat titles
+    cost a dict lookup.
+    """
+
+    def __init__(
+        self,
+        role_aliases: Dict[str, List[str]],
+        embed: Callable[[List[str]], np.ndarray],
+        default_role: str,
+        min_confidence: float = 0.35,
+        cache_size: int = 4096
+    ):
+        self.embed = embed
+        self.default_role = default_role
+        self.min_confidence = min_confidence
+
+        self._forms: List[str] = []
+        self._form_roles: List[str] = []
+        for role, aliases in role_aliases.items():
+            for form in dict.fromkeys([role, *aliases]):
+                self._forms.append(self._normalize(form))
+                self._form_roles.append(role)
+        self._exact = dict(zip(self._forms, self._form_roles))
+
+        matrix = np.asarray(embed(self._forms), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.maximum(norms, 1e-10)
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+        logger.info(f"Role resolver ready: {len(role_aliases)} roles, {len(self._forms)} names/aliases")
+
+    @staticmethod
+    def _normalize(title: str) -> str:
+        words = [w for w in _SEPARATORS.split(title.lower()) if w]
+        meaningful = [w for w in words if w not in _NOISE_WORDS]
+        # "Engineer" alone keeps its words rather than collapsing to nothing
+        return " ".join(meaningful or words)
+
+    def resolve(self, title: str) -> Tuple[str, float]:
+        """Return (role, confidence). Confidence is 1.0 for an exact name/alias match."""
+        if not title or not title.strip():
+            return self.default_role, 0.0
+        return self._resolve_cached(self._normalize(title))
+
+    def _resolve(self, title: str) -> Tuple[str, float]:
+        role = self._exact.get(title)
+        if role is not None:
+            return role, 1.0
+
+        vector = np.asarray(self.embed([title]), dtype=np.float32)[0]
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return self.default_role, 0.0
+        scores = self._matrix @ (vector / norm)
+        best = int(np.argmax(scores))
+        confidence = round(float(scores[best]), 4)
+        if confidence < self.min_confidence:
+            return self.default_role, confidence
+        return self._form_roles[best], confidence
+
+    def stats(self) -> Dict:
+        info = self._resolve_cached.cache_info()
+        return {
+            "forms": len(self._forms),
+            "cached_titles": info.currsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "min_confidence": self.min_confidence,
+        }
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import select
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional
+
+from modules.upstream_executor import UpstreamExecutor
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+# Workers get PATH and nothing else - API keys in our environment must not be inherited
+WORKER_ENV = {"PATH": "/usr/local/bin:/usr/bin:/bin"}
+UNAVAILABLE = "Sandbox unavailable, please retry"
+_SECRET_NAME = re.compile(r"KEY|TOKEN|SECRET|PASSWORD|PASSWD|CREDENTIAL|_URI$|_URL$", re.IGNORECASE)
+
+
+class SandboxWorkerError(RuntimeError):
+    """The worker process died or stopped answering - it is replaced, the job is reported as an error."""
+
+
+class SandboxWorker:
+    """One warm `sandbox_worker.py` interpreter, spoken to over line-delimited JSON pipes."""
+
+    def __init__(self, startup_timeout: float = 10.0):
+        self.jobs = 0
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=WORKER_ENV,
+            close_fds=True,
+            start_new_session=True  # our signals (Ctrl+C) are not the worker's
+        )
+        ready = self._read_line(startup_timeout)
+        if ready is None:
+            self.kill()
+            raise SandboxWorkerError("Sandbox worker failed to start")
+        self.isolated = bool(ready.get("isolated"))
+        self.reason = ready.get("reason")
+
+    def _read_line(self, timeout: float) -> Optional[Dict]:
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            return None
+        line = self.process.stdout.readline()
+        return json.loads(line) if line else None
+
+    def execute(self, job: Dict, timeout: float) -> Dict:
+        self.jobs += 1
+        try:
+            self.process.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+            self.process.stdin.flush()
+            result = self._read_line(timeout)
+        except (OSError, ValueError) as e:
+            raise SandboxWorkerError(f"Sandbox worker failed: {e}") from e
+        if result is None:
+            raise SandboxWorkerError("Sandbox worker did not answer in time")
+        return result
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def stop(self):
+        try:
+            self.process.stdin.close()  # EOF ends the serve loop
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class SandboxPool:
+    """
+    Pre-started grading workers that run submissions against a test case.
+
+    `size` warm interpreters are started up front; each job forks a
+    locked-down child inside one of them (see sandbox_worker), so a run
+    pays a fork rather than an interpreter start. Every run is limited to
+    `cpu_seconds` of CPU, `memory_mb` of address space and `wall_seconds`
+    of real time, runs as `nobody` in a network namespace without
+    interfaces, and cannot start processes or write files.
+
+    Isolation needs root and Linux namespaces. When the first worker
+    reports it is not isolated, the pool starts no others and every run is
+    answered with status "unavailable" - code is never executed without
+    the OS boundary.
+
+    Workers are replaced after `max_jobs_per_worker` jobs, and immediately
+    if one dies or hangs; a replacement that fails to start is retried in
+    the background with backoff, so the pool never shrinks for good. A run
+    that finds no idle worker within `acquire_timeout` seconds is answered
+    with status "unavailable" instead of queueing forever. Waiting on a worker happens on a dedicated
+    executor, never on the event loop.
+
+    Results carry no program output, and error messages are scrubbed of
+    any secret-looking value from this process's environment before they
+    reach a client.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs_per_worker: int = 100,
+        cpu_seconds: float = 2.0,
+        memory_mb: int = 256,
+        wall_seconds: float = 5.0,
+        acquire_timeout: float = 10.0
+    ):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.limits = {"cpu_seconds": cpu_seconds, "memory_mb": memory_mb, "wall_seconds": wall_seconds}
+        self.acquire_timeout = acquire_timeout
+        self.executor = UpstreamExecutor("sandbox", max_workers=size)
+
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[SandboxWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.isolated = False
+        self.reason: Optional[str] = None
+        self._secrets = sorted(
+            (value for name, value in os.environ.items() if _SECRET_NAME.search(name) and len(value) >= 6),
+            key=len,
+            reverse=True
+        )
+
+        self.runs = 0
+        self.passed = 0
+        self.limit_kills = 0
+        self.recycled = 0
+        self.worker_failures = 0
+        self.unavailable = 0
+        self.total_runtime_ms = 0.0
+
+    async def start(self):
+        """Start the workers. Raises SandboxWorkerError or OSError when they cannot be spawned."""
+        self._idle = asyncio.Queue()
+        try:
+            first = await self.executor.run(self._spawn)
+            self.isolated, self.reason = first.isolated, first.reason
+            if not self.isolated:
+                await self.executor.run(self._retire, first)
+                logger.error(f"Sandbox isolation unavailable ({self.reason}); submissions will not be executed")
+                return
+            self._idle.put_nowait(first)
+            for _ in range(self.size - 1):
+                self._idle.put_nowait(await self.executor.run(self._spawn))
+        except Exception:
+            self.shutdown()
+            raise
+        logger.info(f"Sandbox pool ready: {self.size} workers, limits {self.limits}")
+
+    def _spawn(self) -> SandboxWorker:
+        worker = SandboxWorker()
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _retire(self, worker: SandboxWorker, kill: bool = False):
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+
+    async def run(self, code: str, test_case: Optional[str]) -> Dict:
+        """
+        Execute `code`, then `test_case` in the same namespace.
+        Returns {"status", "passed", "runtime_ms", "cpu_ms", "peak_memory_kb", "wall_ms", "error"?};
+        status "unavailable" means the code was not run.
+        """
+        if not self.isolated:
+            self.unavailable += 1
+            return {"status": "unavailable", "passed": False, "error": UNAVAILABLE}
+        job = {"code": code, "test_case": test_case, **self.limits}
+        # The worker kills the job at wall_seconds; the extra margin only catches a wedged worker
+        timeout = self.limits["wall_seconds"] + 5.0
+
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.unavailable += 1
+            return {"status": "unavailable", "passed": False, "error": UNAVAILABLE}
+        replace = False
+        try:
+            result = await self.executor.run(worker.execute, job, timeout)
+        except SandboxWorkerError as e:
+            logger.error(f"{e}; replacing worker")
+            self.worker_failures += 1
+            replace = True
+            result = {"status": "unavailable", "passed": False, "error": UNAVAILABLE}
+        finally:
+            if replace or not worker.alive:
+                await self.executor.run(self._retire, worker, True)
+                await self._respawn()
+            elif worker.jobs >= self.max_jobs_per_worker:
+                self.recycled += 1
+                # Recycle off the request path; the pool runs one short until the new worker is up
+                asyncio.create_task(self._recycle(worker))
+            else:
+                self._idle.put_nowait(worker)
+
+        if result.get("error"):
+            result["error"] = self._scrub(str(result["error"]))
+        self.runs += 1
+        self.passed += bool(result.get("passed"))
+        self.limit_kills += result.get("status") in ("timeout", "cpu_limit", "memory_limit")
+        self.total_runtime_ms += result.get("runtime_ms", 0.0)
+        return result
+
+    def _scrub(self, text: str) -> str:
+        for secret in self._secrets:
+            text = text.replace(secret, "[redacted]")
+        return text
+
+    async def _recycle(self, worker: SandboxWorker):
+        await self.executor.run(self._retire, worker)
+        await self._respawn()
+
+    async def _respawn(self):
+        """Put one new worker into the pool; if that fails, keep retrying in the background."""
+        try:
+            self._idle.put_nowait(await self.executor.run(self._spawn))
+        except Exception as e:
+            logger.error(f"Sandbox worker restart failed: {e}; retrying in the background")
+            self.worker_failures += 1
+            asyncio.create_task(self._respawn_later())
+
+    async def _respawn_later(self):
+        delay = 1.0
+        while not self._closed:
+            await asyncio.sleep(delay)
+            try:
+                worker = await self.executor.run(self._spawn)
+            except Exception as e:
+                logger.error(f"Sandbox worker restart failed: {e}")
+                self.worker_failures += 1
+                delay = min(delay * 2, 60.0)
+                continue
+            if self._closed:
+                self._retire(worker)
+            else:
+                self._idle.put_nowait(worker)
+            return
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+        self.executor.shutdown()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            workers = list(self._workers)
+        alive = sum(worker.alive for worker in workers)
+        return {
+            "workers": alive,
+            "isolated": self.isolated,
+            "isolation_unavailable_reason": self.reason,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "max_jobs_per_worker": self.max_jobs_per_worker,
+            "limits": self.limits,
+            "runs": self.runs,
+            "passed": self.passed,
+            "limit_kills": self.limit_kills,
+            "recycled": self.recycled,
+            "worker_failures": self.worker_failures,
+            "unavailable": self.unavailable,
+            "avg_runtime_ms": round(self.total_runtime_ms / self.runs, 3) if self.runs else 0.0,
+        }
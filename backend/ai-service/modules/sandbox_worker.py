@@ -0,0 +1,432 @@
+"""
+Warm grading worker, run as `python -I sandbox_worker.py` by SandboxPool.
+
+Reads one JSON job per line on stdin and writes one JSON result per line
+on stdout. The interpreter and the usual solution imports are loaded once;
+each job then runs in a child forked from this warm process, so a job
+costs a fork instead of an interpreter start, and nothing a submission
+does (monkeypatching, leaked globals) survives into the next job.
+
+The boundary is the kernel's. At startup the worker moves itself into
+a new network namespace (loopback only, no route out) and a private
+mount namespace in which the service directory (where .env lives),
+/root and /home are covered by empty read-only tmpfs mounts. Each child
+then drops its limits irreversibly before touching user code: RLIMIT_CPU
+and RLIMIT_AS for CPU time and memory, no file writes (RLIMIT_FSIZE), no
+new processes, and the uid/gid of `nobody`. That needs root, Linux
+namespaces and a Python install `nobody` can read; a forked probe checks
+all of it, and if it fails the worker reports `isolated: false` and
+refuses every job with status "unavailable" - submissions never run
+unconfined. An audit hook (sockets, subprocesses, exec/fork/kill, file
+writes, /proc, /sys, /dev, password hashes) is a second line of defence
+on top; audit hooks are not a sandbox. The wall-clock limit is enforced
+from here with SIGKILL.
+
+The verdict cannot be forged from inside the child even though user code
+shares its process: the child's audit hook holds a per-job nonce (sent
+after the fork, kept only in the hook's closure) and writes the report
+only when the event is raised from the trusted `_child` frame; a report
+without the nonce is treated as an error. The hook is why gc
+introspection, tracing, marshal and building code objects are refused.
+
+SandboxPool starts this process with an environment holding only PATH,
+and submissions never see what they print - stdout/stderr are /dev/null.
+
+Standard library only - this file must not import the service.
+"""
+import json
+import os
+import pwd
+import resource
+import select
+import signal
+import stat
+import sys
+import time
+
+# Warm the imports submissions commonly use; forked children inherit them
+import bisect  # noqa: F401
+import collections  # noqa: F401
+import functools  # noqa: F401
+import heapq  # noqa: F401
+import itertools  # noqa: F401
+import math  # noqa: F401
+import re  # noqa: F401
+import string  # noqa: F401
+import typing  # noqa: F401
+
+try:
+    _NOBODY = pwd.getpwnam("nobody")
+    SANDBOX_UID, SANDBOX_GID = _NOBODY.pw_uid, _NOBODY.pw_gid
+except KeyError:
+    SANDBOX_UID = SANDBOX_GID = 65534
+
+
+
+def _world_readable(path):
+    """The sandbox user can still import from `path` (every parent traversable, the directory listable)."""
+    path = os.path.realpath(path)
+    if not os.stat(path).st_mode & stat.S_IROTH:
+        return False
+    while True:
+        mode = os.stat(path).st_mode
+        if not mode & stat.S_IXOTH:
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+
+
+# backend/ - holds .env, the caches and the service code
+_SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_READ_BLOCKED = tuple(
+    root for root in ("/proc", "/sys", "/dev", "/root", "/home", "/etc/shadow", "/etc/gshadow", "/etc/ssh", _SERVICE_ROOT)
+    if root != "/"
+)
+_READ_ALLOWED = ("/dev/null", "/dev/urandom") + tuple(
+    {os.path.realpath(prefix) for prefix in (sys.prefix, sys.base_prefix, sys.exec_prefix)}
+)
+
+_BLOCKED_EVENTS = frozenset({
+    "socket.__new__", "socket.bind", "socket.connect", "socket.getaddrinfo", "socket.gethostbyname",
+    "subprocess.Popen", "os.system", "os.exec", "os.posix_spawn", "os.spawn",
+    "os.fork", "os.forkpty", "os.kill", "os.killpg", "pty.spawn",
+    "ctypes.dlopen", "os.remove", "os.rename", "os.rmdir", "os.chmod", "os.chown",
+    "shutil.rmtree", "os.truncate", "os.link", "os.symlink",
+    # Ways to reach the hook's closure (the nonce), rewrite a running frame or run forged bytecode
+    "gc.get_objects", "gc.get_referrers", "gc.get_referents", "sys.settrace", "sys.setprofile",
+    "sys.addaudithook", "code.__new__", "marshal.load", "marshal.loads",
+})
+_BLOCKED_IMPORTS = frozenset({"ctypes", "_ctypes", "_posixsubprocess", "_xxsubinterpreters"})
+_REPORT_EVENT = "sandbox.report"
+_REPORTED_STATUSES = frozenset({b"passed", b"failed", b"error", b"memory_limit"})
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+
+CLONE_NEWNS, CLONE_NEWNET = 0x00020000, 0x40000000
+MS_RDONLY, MS_NOSUID, MS_NODEV, MS_NOEXEC, MS_REC, MS_PRIVATE = 0x1, 0x2, 0x4, 0x8, 0x4000, 0x40000
+# Covered by an empty tmpfs in the worker's mount namespace - unless the Python install lives there
+_HIDDEN_DIRS = (_SERVICE_ROOT, "/root", "/home")
+# A child exits with this when it could not lock itself down; the job never ran
+_LOCKDOWN_FAILED = 3
+UNAVAILABLE_ERROR = "Sandbox isolation unavailable: submissions are not executed"
+
+ISOLATED = False  # set by serve() once _isolate_worker() and the probe succeed
+
+
+def _make_audit_hook(nonce_fd, result_fd, child_frame, getframe=sys._getframe, getcwd=os.getcwd,
+                     readlink=os.readlink, read=os.read, write=os.write, close=os.close, exit_=os._exit,
+                     str_type=str, bytes_type=bytes, int_type=int, type_of=type, denied=PermissionError):
+    """
+    Build the child's audit hook, which also owns the result pipe.
+
+    The job nonce is read here and lives only in this closure - never in a
+    frame, where user code could read it. Only `child_frame` may raise
+    the report event that writes "<nonce> <status> <runtime_ms>\\n<error>",
+    so whatever else lands on the pipe is rejected by the parent.
+    Everything the hook consults is bound here rather than looked up when
+    it runs: a submission can rebind names in os, posixpath, builtins or
+    this module, but not the cells of a closure it has no reference to.
+    """
+    nonce = read(nonce_fd, 64)
+    close(nonce_fd)
+    blocked_events, blocked_imports, report_event = _BLOCKED_EVENTS, _BLOCKED_IMPORTS, _REPORT_EVENT
+    read_blocked, read_allowed, write_flags = _READ_BLOCKED, _READ_ALLOWED, _WRITE_FLAGS
+
+    def resolve(path):
+        if not path.startswith("/"):
+            path = getcwd() + "/" + path
+        parts, pending, links = [], path.split("/")[::-1], 0
+        while pending:
+            part = pending.pop()
+            if part in ("", "."):
+                continue
+            if part == "..":
+                parts = parts[:-1]
+                continue
+            try:
+                target = readlink("/" + "/".join(parts + [part]))
+            except OSError:
+                parts = parts + [part]
+                continue
+            links += 1
+            if links > 40:
+                raise denied("too many levels of symbolic links")
+            if target.startswith("/"):
+                parts = []
+            pending = pending + target.split("/")[::-1]
+        return "/" + "/".join(parts)
+
+    def under(path, roots):
+        for root in roots:
+            if path == root or path.startswith(root + "/"):
+                return True
+        return False
+
+    def hook(event, args):
+        if event in blocked_events or event.startswith("ctypes."):
+            raise denied(event + " is not allowed in the sandbox")
+        if event == report_event:
+            if getframe(1) is not child_frame:
+                raise denied("only the sandbox reports a verdict")
+            status, runtime_ms, error = args
+            write(result_fd, b"%s %s %.3f\n" % (nonce, status.encode(), runtime_ms) + error[:500].encode("utf-8", "replace"))
+            exit_(0)
+        if event == "import" and args[0] in blocked_imports:
+            raise denied("importing " + args[0] + " is not allowed in the sandbox")
+        if event == "open":
+            path, mode, flags = args
+            if (type_of(mode) is str_type and ("w" in mode or "a" in mode or "x" in mode or "+" in mode)) \
+                    or (type_of(flags) is int_type and flags & write_flags):
+                raise denied("writing files is not allowed in the sandbox")
+            if path is None or type_of(path) is int_type:  # an already open descriptor
+                return
+            if type_of(path) is bytes_type:
+                path = path.decode("utf-8", "surrogateescape")
+            elif type_of(path) is not str_type:  # path-likes can answer differently on the second __fspath__
+                raise denied("open files by str path in the sandbox")
+            path = resolve(path)
+            if under(path, read_blocked) and not under(path, read_allowed):
+                raise denied("reading this path is not allowed in the sandbox")
+
+    return hook
+
+
+def _isolate_worker():
+    """
+    Move this worker into its own network and mount namespaces and hide
+    _HIDDEN_DIRS there. Forked children inherit both. Raises OSError when
+    the kernel refuses (not root, no namespace support).
+    """
+    import ctypes  # imported here only, and unloaded again below
+
+    libc = ctypes.CDLL(None, use_errno=True)
+
+    def call(function, *args):
+        if function(*args) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    call(libc.unshare, CLONE_NEWNS | CLONE_NEWNET)
+    # Nothing mounted here propagates back to the host
+    call(libc.mount, None, b"/", None, MS_REC | MS_PRIVATE, None)
+    for path in _HIDDEN_DIRS:
+        if not os.path.isdir(path) or any(
+            prefix == path or prefix.startswith(path + "/") for prefix in _READ_ALLOWED
+        ):
+            continue
+        call(libc.mount, b"tmpfs", path.encode(), b"tmpfs",
+             MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC, b"size=4k,mode=0555")
+    # Drop every route back to libc before any submission runs: a later `import ctypes` is audited
+    for name in [name for name in sys.modules if name == "ctypes" or name.startswith(("ctypes.", "_ctypes"))]:
+        del sys.modules[name]
+
+
+def _drop_privileges():
+    os.setgroups([])
+    os.setgid(SANDBOX_GID)
+    os.setuid(SANDBOX_UID)
+
+
+def _probe_isolation():
+    """
+    Fork a child that drops to nobody the way a job does, then checks the
+    standard library is still importable and no interface but loopback
+    exists. True only if every step worked.
+    """
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            _drop_privileges()
+            stdlib = os.path.dirname(os.__file__)
+            os.listdir(stdlib)
+            with open(os.__file__, "rb") as f:
+                f.read(1)
+            import socket
+            interfaces = {name for _, name in socket.if_nameindex()}
+            if os.getuid() == SANDBOX_UID and interfaces <= {"lo"}:
+                code = 0
+        except BaseException:
+            pass
+        os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+
+def _lock_down(job, hook):
+    cpu = max(1, int(job["cpu_seconds"]))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))  # SIGXCPU, then SIGKILL
+    memory = int(job["memory_mb"]) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    os.chdir("/")
+    # As root RLIMIT_NPROC is not enforced and every file is readable - become nobody
+    _drop_privileges()
+    sys.dont_write_bytecode = True
+    sys.pycache_prefix = "/nonexistent"  # imports compile from source: marshal (crafted bytecode) is blocked
+    sys.addaudithook(hook)  # cannot be removed once installed
+
+
+def _compile_test(test_case):
+    """An expression test passes when truthy; a statement test (asserts, "pass") when it does not raise."""
+    test_case = (test_case or "").strip() or "pass"
+    try:
+        return compile(test_case, "<test_case>", "eval"), True
+    except SyntaxError:
+        return compile(test_case, "<test_case>", "exec"), False
+
+
+def _child(job, nonce_fd, result_fd):
+    # User code shares this process and can rebind any global, so everything the verdict depends
+    # on after it runs is bound to locals first; the report itself goes through the audit hook
+    report, clock, evaluate, execute, truth, type_of = sys.audit, time.perf_counter, eval, exec, bool, type
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):  # stdout is the worker's protocol channel - user code must not reach it
+        os.dup2(devnull, fd)
+    status, error = "error", ""
+    started = clock()
+    try:
+        submission = compile(job["code"], "<submission>", "exec")
+        test, is_expression = _compile_test(job.get("test_case"))
+        namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+        hook = _make_audit_hook(nonce_fd, result_fd, sys._getframe())
+        try:
+            _lock_down(job, hook)
+        except OSError:
+            os._exit(_LOCKDOWN_FAILED)  # never run a submission without its limits
+        execute(submission, namespace)
+        if is_expression:
+            passed = truth(evaluate(test, namespace))
+        else:
+            execute(test, namespace)
+            passed = True
+        status = "passed" if passed else "failed"
+    except MemoryError:
+        status, error = "memory_limit", "Memory limit exceeded"
+    except AssertionError as e:
+        status, error = "failed", "AssertionError"
+        error = f"AssertionError: {e}" if f"{e}" else error
+    except RecursionError:
+        error = "RecursionError: maximum recursion depth exceeded"
+    except BaseException as e:  # SystemExit included - user code decides nothing about the verdict
+        error = f"{type_of(e).__name__}: {e}"
+    report(_REPORT_EVENT, status, (clock() - started) * 1000, error)
+
+
+def _read_all(fd):
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _parse_report(payload, nonce):
+    """The child's report, or None unless it carries this job's nonce - anything else came from user code."""
+    header, _, error = payload.partition(b"\n")
+    fields = header.split(b" ")
+    if len(fields) != 3 or fields[0] != nonce or fields[1] not in _REPORTED_STATUSES:
+        return None
+    status = fields[1].decode()
+    result = {"status": status, "passed": status == "passed", "runtime_ms": round(float(fields[2]), 3)}
+    if error:
+        result["error"] = error.decode("utf-8", "replace")
+    return result
+
+
+def run_job(job):
+    nonce_read, nonce_write = os.pipe()
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(nonce_write)
+        os.close(read_fd)
+        _child(job, nonce_read, write_fd)
+        os._exit(1)  # unreachable: the report exits
+    os.close(nonce_read)
+    os.close(write_fd)
+    # Drawn after the fork, so the child's copy of this frame never held it
+    nonce = os.urandom(16).hex().encode()
+    os.write(nonce_write, nonce)
+    os.close(nonce_write)
+
+    timed_out = False
+    chunks = []
+    deadline = started + float(job["wall_seconds"])
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            timed_out = True
+            break
+        ready, _, _ = select.select([read_fd], [], [], remaining)
+        if ready:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    if timed_out:
+        os.kill(pid, signal.SIGKILL)
+        chunks.append(_read_all(read_fd))
+    os.close(read_fd)
+    _, exit_status, usage = os.wait4(pid, 0)
+    wall_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    result = _parse_report(b"".join(chunks), nonce)
+    if result is None or timed_out:
+        if timed_out:
+            result = {"status": "timeout", "error": f"Wall-clock limit of {job['wall_seconds']}s exceeded"}
+        elif os.WIFSIGNALED(exit_status) and os.WTERMSIG(exit_status) in (signal.SIGXCPU, signal.SIGKILL):
+            result = {"status": "cpu_limit", "error": f"CPU limit of {job['cpu_seconds']}s exceeded"}
+        elif os.WIFEXITED(exit_status) and os.WEXITSTATUS(exit_status) == _LOCKDOWN_FAILED:
+            result = {"status": "unavailable", "error": UNAVAILABLE_ERROR}
+        elif os.WIFEXITED(exit_status):
+            result = {"status": "error", "error": "Submission exited before the test case ran"}
+        else:
+            result = {"status": "error", "error": "Submission crashed the interpreter"}
+        result.update(passed=False, runtime_ms=wall_ms)
+
+    result["cpu_ms"] = round((usage.ru_utime + usage.ru_stime) * 1000, 3)
+    result["peak_memory_kb"] = usage.ru_maxrss  # kilobytes on Linux
+    result["wall_ms"] = wall_ms
+    return result
+
+
+def serve():
+    global ISOLATED
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+    reason = None
+    if os.geteuid() != 0:
+        reason = "the service is not running as root, so jobs cannot switch to a sandbox user"
+    elif not _world_readable(os.path.dirname(os.__file__)):
+        reason = f"the Python install ({sys.prefix}) is not readable by 'nobody'"
+    else:
+        try:
+            _isolate_worker()
+            ISOLATED = _probe_isolation()
+            reason = None if ISOLATED else "the isolation probe failed"
+        except OSError as e:
+            reason = f"network/mount namespaces unavailable ({e})"
+    protocol.write(json.dumps({"ready": True, "isolated": ISOLATED, "reason": reason}) + "\n")
+    protocol.flush()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        if not ISOLATED:
+            result = {"status": "unavailable", "passed": False, "error": UNAVAILABLE_ERROR}
+        else:
+            try:
+                result = run_job(json.loads(line))
+            except Exception as e:
+                result = {"status": "error", "passed": False, "error": f"Sandbox failure: {e}"}
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    serve()
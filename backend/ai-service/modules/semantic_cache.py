@@ -0,0 +1,210 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Digits, code punctuation: "is O(n) fine?" vs "is O(n^2) fine?" differ in exactly what matters
+_NOT_INTENT = re.compile(r"[0-9`(){}\[\]=<>;_+*/%\\|&^~#@$]")
+_WORD = re.compile(r"[a-z]+")
+# Politeness and padding - dropped before comparing, so "can you give me a hint?" == "give me a hint"
+_FILLER = frozenset(
+    "can could would will you please pls plz kindly just maybe hey hi hello ok okay so um noor".split()
+)
+# Function words - neither embedded nor required to agree between two messages
+_STOPWORDS = frozenset(
+    "a an the is are was be it this that these my me i to of for in on at with and or do does did "
+    "what how why which should".split()
+)
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def _intent(message: str, max_words: int) -> Optional[Tuple[str, frozenset]]:
+    """
+    (intent text, content terms) for a short plain-language message, else None.
+    Only these take part in similarity matching; anything with code or
+    numbers, or longer than `max_words`, is reused on an exact match only.
+    """
+    if _NOT_INTENT.search(message):
+        return None
+    words = [word for word in _WORD.findall(message) if word not in _FILLER]
+    if not words or len(words) > max_words:
+        return None
+    terms = [_stem(word) for word in words if len(word) > 1 and word not in _STOPWORDS]
+    return " ".join(terms or words), frozenset(terms)
+
+
+def _same_terms(a: frozenset, b: frozenset) -> bool:
+    """Every content word on each side has a counterpart on the other (equal, or the same 4+ letter stem)."""
+    def covered(word, others):
+        return word in others or any(
+            len(word) >= 4 and len(other) >= 4 and (word.startswith(other) or other.startswith(word))
+            for other in others
+        )
+    return all(covered(word, b) for word in a) and all(covered(word, a) for word in b)
+
+
+class _Entry:
+    __slots__ = ("context", "message", "terms", "vector", "reply", "created_at")
+
+    def __init__(self, context: str, message: str, terms: Optional[frozenset], vector: Optional[np.ndarray],
+                 reply: str, created_at: float):
+        self.context = context
+        self.message = message
+        self.terms = terms
+        self.vector = vector
+        self.reply = reply
+        self.created_at = created_at
+
+
+class SemanticResponseCache:
+    """
+    Reply cache keyed by (context, message meaning) rather than exact text.
+
+    Entries are grouped by normalized context (the problem being solved).
+    Identical text (after normalization) is a dict lookup and never needs
+    an embedding. Beyond that, only short plain-language messages (at most
+    `max_words` words, no digits or code) are matched by meaning: filler
+    such as "can you"/"please" and function words are dropped, the content
+    words are embedded and compared by cosine similarity against that context's stacked vectors,
+    and a candidate at or above `threshold` is a hit only if both messages
+    use the same content words. So "give me a hint" and "can you give me a
+    hint?" share one LLM reply, while "what is the time complexity?" and
+    "what is the space complexity?" - close in embedding space - do not.
+    benchmarks/bench_reply_cache.py holds the labelled pairs this must get
+    right.
+
+    Bounded by `max_entries` (least recently used evicted first) and
+    `max_per_context`; entries older than `ttl` seconds are dropped.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], np.ndarray],
+        threshold: float = 0.9,
+        max_words: int = 8,
+        max_entries: int = 2048,
+        max_per_context: int = 64,
+        ttl: float = 86400.0
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_words = max_words
+        self.max_entries = max_entries
+        self.max_per_context = max_per_context
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()  # LRU order
+        self._contexts: Dict[str, List[_Entry]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}  # per context, rows aligned with _contexts
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _vector(self, message: str) -> np.ndarray:
+        return np.asarray(self.embed([message]), dtype=np.float32)[0]
+
+    def get(self, context: Optional[str], message: str) -> Optional[str]:
+        context, message = _normalize(context), _normalize(message)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((context, message))
+            if entry is not None and now - entry.created_at < self.ttl:
+                self._entries.move_to_end((context, message))
+                self.exact_hits += 1
+                return entry.reply
+            has_candidates = bool(self._contexts.get(context))
+        intent = _intent(message, self.max_words) if has_candidates else None
+        if intent is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        text, terms = intent
+        vector = self._vector(text)  # outside the lock - embedding is the slow part
+        with self._lock:
+            self._expire(context, now)
+            matrix = self._matrices.get(context)
+            if matrix is not None and np.any(vector):
+                scores = matrix @ vector
+                for best in np.argsort(-scores):
+                    if scores[best] < self.threshold:
+                        break
+                    entry = self._contexts[context][int(best)]
+                    if _same_terms(terms, entry.terms):
+                        self._entries.move_to_end((entry.context, entry.message))
+                        self.semantic_hits += 1
+                        return entry.reply
+            self.misses += 1
+            return None
+
+    def put(self, context: Optional[str], message: str, reply: str):
+        context, message = _normalize(context), _normalize(message)
+        intent = _intent(message, self.max_words)
+        terms, vector = (intent[1], self._vector(intent[0])) if intent is not None else (None, None)
+        now = time.time()
+        with self._lock:
+            if (context, message) in self._entries:
+                self._remove(self._entries[(context, message)])
+            entry = _Entry(context, message, terms, vector, reply, now)
+            self._entries[(context, message)] = entry
+            if vector is not None:
+                self._contexts.setdefault(context, []).append(entry)
+                bucket = self._contexts[context]
+                while len(bucket) > self.max_per_context:
+                    self._remove(bucket[0])  # oldest in this context
+                    self.evictions += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries.values())))
+                self.evictions += 1
+            self._rebuild(context)
+
+    def _expire(self, context: str, now: float):
+        bucket = self._contexts.get(context, [])
+        for entry in [entry for entry in bucket if now - entry.created_at >= self.ttl]:
+            self._remove(entry)
+
+    def _remove(self, entry: _Entry):
+        self._entries.pop((entry.context, entry.message), None)
+        if entry.vector is not None:
+            self._contexts[entry.context].remove(entry)
+            self._rebuild(entry.context)
+
+    def _rebuild(self, context: str):
+        bucket = self._contexts.get(context)
+        if bucket:
+            self._matrices[context] = np.stack([entry.vector for entry in bucket])
+        else:
+            self._contexts.pop(context, None)
+            self._matrices.pop(context, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "contexts": len(self._contexts),
+                "threshold": self.threshold,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "skill_graph.json")
+
+
+class SkillGraph:
+    """
+    Weighted, directed skill graph for recommendations.
+
+    Built once from {skill: {related_skill: weight}} into a sparse transition
+    matrix kept as edge arrays (sorted by source), with weights normalized
+    per source. Recommendations are a truncated personalized PageRank seeded
+    with the user's skills:
+
+        r = sum_{t=1..steps} damping^t * (P^T)^t s
+
+    so direct neighbours dominate, while skills reachable over several
+    hops - and through several of the user's skills - accumulate score.
+    Each step is one scatter-add over the edge list (np.bincount).
+    """
+
+    def __init__(
+        self,
+        relationships: Dict[str, Dict[str, float]],
+        popular: Optional[List[str]] = None,
+        damping: float = 0.5,
+        steps: int = 3
+    ):
+        self.damping = damping
+        self.steps = steps
+
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        popular = popular or []
+        for skill in popular:
+            self._node(skill)
+        sources, targets, weights = [], [], []
+        for source, related in relationships.items():
+            for target, weight in related.items():
+                if weight <= 0 or target == source:
+                    continue
+                sources.append(self._node(source))
+                targets.append(self._node(target))
+                weights.append(float(weight))
+
+        n = len(self.nodes)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # Row-normalize: each source spreads exactly its own score over its edges
+        out_weight = np.bincount(sources, weights=weights, minlength=n)
+        order = np.argsort(sources, kind="stable")
+        self._sources = sources[order]
+        self._targets = targets[order]
+        self._weights = weights[order] / out_weight[self._sources]
+
+        # Fallback ranking when the seeds lead nowhere: the curated popular list first, then weighted in-degree
+        in_weight = np.bincount(self._targets, weights=self._weights, minlength=n)
+        self._popularity = in_weight.copy()
+        boost = in_weight.max(initial=0.0) + 1
+        for rank, skill in enumerate(popular):
+            self._popularity[self.index[skill]] = boost + len(popular) - rank
+
+    def _node(self, skill: str) -> int:
+        idx = self.index.get(skill)
+        if idx is None:
+            idx = self.index[skill] = len(self.nodes)
+            self.nodes.append(skill)
+        return idx
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, **kwargs) -> "SkillGraph":
+        path = path or DEFAULT_GRAPH_PATH
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        relationships = {
+            source: related if isinstance(related, dict) else {target: 1.0 for target in related}
+            for source, related in data.get("relationships", {}).items()
+        }
+        graph = cls(relationships, data.get("popular"), **kwargs)
+        logger.info(f"Skill graph loaded: {len(graph)} skills, {graph.edge_count} edges")
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self._targets.size)
+
+    def __contains__(self, skill: str) -> bool:
+        return skill in self.index
+
+    def propagate(self, seeds: Iterable[str]) -> np.ndarray:
+        """Multi-hop score for every node, seeded uniformly by the known skills."""
+        n = len(self.nodes)
+        seed_ids = sorted({self.index[s] for s in seeds if s in self.index})
+        scores = np.zeros(n)
+        if not seed_ids:
+            return scores
+        frontier = np.zeros(n)
+        frontier[seed_ids] = 1.0 / len(seed_ids)
+        for _ in range(self.steps):
+            frontier = self.damping * np.bincount(
+                self._targets, weights=frontier[self._sources] * self._weights, minlength=n
+            )
+            scores += frontier
+        return scores
+
+    def recommend(self, skills: Iterable[str], k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Top-k related skills the user does not already have, best first.
+        Ties break on node order, so results are identical across processes.
+        Falls back to popular skills only when the graph yields nothing at all.
+        """
+        known = set(skills)
+        scores = self.propagate(known)
+        known_ids = [self.index[s] for s in known if s in self.index]
+        scores[known_ids] = 0.0
+
+        ranked = self._top_k(scores, k)
+        result = [(self.nodes[i], round(float(scores[i]), 6)) for i in ranked]
+
+        if not result:
+            popularity = self._popularity.copy()
+            popularity[known_ids] = 0.0
+            result = [(self.nodes[i], 0.0) for i in self._top_k(popularity, k)]
+        return result
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        positive = np.flatnonzero(scores > 0)
+        if positive.size > k:
+            # argpartition on (-score), then an exact (score desc, index asc) sort of the k winners
+            top = positive[np.argpartition(-scores[positive], k - 1)[:k]]
+            threshold = scores[top].min()
+            # Include every tie at the cut-off so the index tie-break is exact, not partition-dependent
+            top = np.union1d(top, positive[scores[positive] == threshold])
+        else:
+            top = positive
+        top = top[np.lexsort((top, -scores[top]))]
+        return top[:k]
+
+    def stats(self) -> Dict:
+        return {
+            "skills": len(self.nodes),
+            "edges": self.edge_count,
+            "damping": self.damping,
+            "steps": self.steps,
+        }
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "skill_taxonomy.json")
+
+# Spaces, underscores, hyphens and slashes all separate words: "scikit_learn" == "scikit-learn" == "scikit learn"
+_SEPARATORS = re.compile(r"[\s_\-/]+")
+
+
+def normalize_text(text: str) -> str:
+    return _SEPARATORS.sub(" ", text.lower()).strip()
+
+
+class SkillTaxonomy:
+    """
+    Skill vocabulary (canonical names + aliases) compiled into one matcher.
+
+    Every surface form is normalized and inserted into a character trie; the
+    trie is emitted as a single regex (shared prefixes become nested groups),
+    so each text is scanned once and the cost per character depends on trie
+    depth, not on how many skills the taxonomy holds. Optional groups are
+    greedy, so the longest form wins ("react native" over "react").
+
+    Matches must sit on word boundaries: "reactor" does not match "react",
+    and "c" is not found inside "c++".
+    """
+
+    def __init__(self, skills: Iterable[Dict]):
+        self.canonical: Dict[str, str] = {}    # normalized surface form -> canonical name
+        self.categories: Dict[str, str] = {}   # canonical name -> category
+        for skill in skills:
+            name = skill["name"]
+            self.categories[name] = skill.get("category", "other")
+            for form in [name, *skill.get("aliases", [])]:
+                key = normalize_text(form)
+                if key and key not in self.canonical:
+                    self.canonical[key] = name
+        self._pattern = self._compile(self.canonical)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SkillTaxonomy":
+        path = path or DEFAULT_TAXONOMY_PATH
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        taxonomy = cls(data.get("skills", []))
+        logger.info(f"Skill taxonomy loaded: {len(taxonomy)} skills, {len(taxonomy.canonical)} surface forms")
+        return taxonomy
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    @staticmethod
+    def _compile(forms: Iterable[str]) -> re.Pattern:
+        trie: Dict = {}
+        for form in forms:
+            node = trie
+            for char in form:
+                node = node.setdefault(char, {})
+            node[""] = True  # end-of-form marker
+
+        def emit(node: Dict) -> str:
+            terminal = "" in node
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if terminal:
+                # Greedy optional: try the longer form first, fall back to the shorter one
+                return f"(?:{body})?" if len(branches) > 1 or len(body) > 1 else f"{body}?"
+            return body
+
+        alternation = emit(trie) or r"(?!)"
+        return re.compile(rf"(?<![a-z0-9])(?:{alternation})(?![a-z0-9+#])")
+
+    def extract(self, text: str) -> Set[str]:
+        """Canonical skills mentioned in text (single pass)."""
+        if not text:
+            return set()
+        return {self.canonical[match] for match in self._pattern.findall(normalize_text(text))}
+
+    def extract_many(self, texts: Iterable[str]) -> Set[str]:
+        # Joined on a newline (a word boundary), so all texts share one scan
+        return self.extract("\n".join(texts))
+
+    def resolve(self, term: str) -> Optional[str]:
+        """Canonical name for an exact skill name or alias, e.g. "ReactJS" -> "react"."""
+        return self.canonical.get(normalize_text(term))
+
+    def category(self, name: str) -> Optional[str]:
+        return self.categories.get(name)
+
+    def names(self) -> List[str]:
+        return list(self.categories)
@@ -0,0 +1,62 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamExecutor:
+    """
+    Bounded thread pool for blocking upstream SDK calls (Gemini, GitHub).
+
+    The Gemini SDK and our retry/rate-limit logic block with time.sleep, so
+    calling them straight from an `async def` handler stalls the whole
+    uvicorn worker. Routing them through here keeps the event loop free;
+    `max_workers` caps how many upstream calls run at once and anything
+    beyond that waits in the pool queue instead of on the loop.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-upstream")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool and await its result."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            result = await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+            with self._lock:
+                self.completed += 1
+            return result
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self.in_flight,
+                # Calls beyond max_workers sit in the pool queue
+                "queued": max(0, self.in_flight - self.max_workers),
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        logger.info(f"Shutting down {self.name} executor")
+        self._pool.shutdown(wait=False, cancel_futures=True)
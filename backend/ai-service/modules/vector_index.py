@@ -0,0 +1,365 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from modules.upstream_executor import UpstreamExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """
+    In-memory nearest-neighbour index for user embeddings.
+
+    Vectors live in one contiguous float32 matrix (rows are L2-normalized, so
+    cosine similarity is a single matrix-vector product). Deleting a user
+    moves the last row into the freed slot, keeping the matrix dense.
+
+    Search modes:
+        exact -> brute-force scan of every row, partial-sorted with argpartition
+        ivf   -> inverted file: rows are bucketed by their nearest k-means
+                 centroid and a query scores only rows in the `nprobe` closest
+                 buckets. Used automatically once the index holds
+                 `ivf_threshold` rows; retrained whenever the population doubles.
+
+    Training (k-means) runs on a copy outside the lock, in the background
+    when "auto" triggers it - queries meanwhile use the previous lists, or
+    an exact scan before the first training. `query` returns the mode it
+    actually used. The async `aquery`/`asave` run on a small executor so
+    scans never block the event loop.
+
+    Persistence: `directory` holds vectors.f32 (memory-mapped on load) and
+    ids.json. save() writes a snapshot; start_snapshots() also writes one
+    every `interval` seconds while there are unsaved changes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        dim: Optional[int] = None,
+        ivf_threshold: int = 50000,
+        nprobe: int = 8,
+    ):
+        self.directory = directory
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+        # IVF state: centroids plus the list id of every row (kept in sync on writes)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignment = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+        self._train_lock = threading.Lock()  # one training run at a time
+        self._training_dirty: Optional[Set[int]] = None  # rows written while a training run is in progress
+
+        self._version = 0  # bumped on every write
+        self._saved_version = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self.executor = UpstreamExecutor("vector_index", max_workers=2)
+
+        if directory:
+            self.load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ----- writes -----
+
+    def upsert(self, user_id: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        with self._lock:
+            if self.dim is None:
+                self.dim = vector.size
+                self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            if vector.size != self.dim:
+                raise ValueError(f"Expected a {self.dim}-dim vector, got {vector.size}")
+
+            row = self._rows.get(user_id)
+            if row is None:
+                row = self._size
+                self._ensure_capacity(row + 1)
+                self._ids.append(user_id)
+                self._rows[user_id] = row
+                self._size += 1
+            self._matrix[row] = vector
+            if self._centroids is not None:
+                self._assignment[row] = int(np.argmax(self._centroids @ vector))
+            self._written(row)
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is None:
+                return False
+            last = self._size - 1
+            if row != last:
+                # Swap the last row into the hole to keep the matrix dense
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._assignment[row] = self._assignment[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+                self._written(row)
+            self._ids.pop()
+            self._size -= 1
+            self._version += 1
+            return True
+
+    def _written(self, row: int):
+        self._version += 1
+        if self._training_dirty is not None:
+            self._training_dirty.add(row)
+
+    def get(self, user_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(user_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def _ensure_capacity(self, rows: int):
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(1024, capacity * 2)
+        while new_capacity < rows:
+            new_capacity *= 2
+        grown = np.empty((new_capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+        assignment = np.zeros(new_capacity, dtype=np.int32)
+        assignment[:self._size] = self._assignment[:self._size]
+        self._assignment = assignment
+
+    # ----- search -----
+
+    def query(
+        self,
+        vector: np.ndarray,
+        k: int = 10,
+        mode: str = "auto",
+        exclude: Optional[str] = None,
+    ) -> Tuple[List[Tuple[str, float]], str]:
+        """Return (up to k (user_id, cosine similarity) pairs best first, mode used: "exact" or "ivf")."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        if mode == "ivf" and self._centroids is None:
+            self.train()  # explicitly asked for IVF: pay for the first training run here
+        with self._lock:
+            if self._size == 0:
+                return [], "exact"
+            if self.dim is not None and vector.size != self.dim:
+                raise ValueError(f"Expected a {self.dim}-dim vector, got {vector.size}")
+
+            wants_ivf = mode == "ivf" or (mode == "auto" and self._size >= self.ivf_threshold)
+            if wants_ivf and (self._centroids is None or self._size >= 2 * self._trained_size):
+                # First training, or retrain once the population has doubled - off this request
+                self._train_in_background()
+            use_ivf = wants_ivf and self._centroids is not None
+            if use_ivf:
+                candidates = self._ivf_candidates(vector)
+                scores = self._matrix[candidates] @ vector
+            else:
+                candidates = None
+                scores = self._matrix[:self._size] @ vector
+
+            if exclude is not None and exclude in self._rows:
+                excluded_row = self._rows[exclude]
+                if candidates is None:
+                    scores[excluded_row] = -np.inf
+                else:
+                    scores[candidates == excluded_row] = -np.inf
+
+            k = min(k, scores.size)
+            if k == 0:
+                return [], "ivf" if use_ivf else "exact"
+            top = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            rows = top if candidates is None else candidates[top]
+            matches = [
+                (self._ids[row], float(score))
+                for row, score in zip(rows, scores[top])
+                if np.isfinite(score)
+            ]
+            return matches, "ivf" if use_ivf else "exact"
+
+    async def aquery(self, vector: np.ndarray, k: int = 10, mode: str = "auto", exclude: Optional[str] = None):
+        """query() on the index executor"""
+        return await self.executor.run(self.query, vector, k, mode, exclude)
+
+    def _ivf_candidates(self, vector: np.ndarray) -> np.ndarray:
+        probes = min(self.nprobe, len(self._centroids))
+        nearest = np.argpartition(-(self._centroids @ vector), probes - 1)[:probes]
+        return np.flatnonzero(np.isin(self._assignment[:self._size], nearest))
+
+    def _train_in_background(self):
+        if self._train_lock.locked():
+            return
+        threading.Thread(target=self.train, name="vector-index-train", daemon=True).start()
+
+    def train(self, iterations: int = 10, max_lists: int = 1024, points_per_list: int = 40):
+        """
+        Spherical k-means over a row sample (~sqrt(N) lists), then assign every row.
+        Works on a copy: the index lock is only held to take it and to swap the result in.
+        """
+        if not self._train_lock.acquire(blocking=False):
+            with self._train_lock:  # another run is in flight - wait for it instead of repeating it
+                return
+        try:
+            with self._lock:
+                if self._size == 0:
+                    return
+                size = self._size
+                data = self._matrix[:size].copy()
+                self._training_dirty = set()
+
+            n_lists = int(min(max_lists, max(1, np.sqrt(size))))
+            rng = np.random.default_rng(0)
+            sample_size = min(size, n_lists * points_per_list)
+            sample = data[rng.choice(size, size=sample_size, replace=False)]
+            centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                # Per-centroid sums via one sort + reduceat (empty lists keep their old centroid)
+                order = np.argsort(assignment, kind="stable")
+                counts = np.bincount(assignment, minlength=n_lists)
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                nonempty = counts > 0
+                sums = np.zeros_like(centroids)
+                sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                empty = norms[:, 0] == 0
+                centroids = np.where(empty[:, None], centroids, sums / np.maximum(norms, 1e-10))
+
+            centroids = centroids.astype(np.float32)
+            assignment = np.empty(size, dtype=np.int32)
+            chunk = 65536
+            for start in range(0, size, chunk):
+                end = min(start + chunk, size)
+                assignment[start:end] = np.argmax(data[start:end] @ centroids.T, axis=1)
+
+            with self._lock:
+                # Rows written (or moved by a delete) since the copy are reassigned from live data
+                dirty = [row for row in self._training_dirty if row < self._size]
+                self._training_dirty = None
+                live = min(size, self._size)
+                self._assignment[:live] = assignment[:live]
+                if dirty:
+                    self._assignment[dirty] = np.argmax(self._matrix[dirty] @ centroids.T, axis=1)
+                self._centroids = centroids
+                self._trained_size = size
+            logger.info(f"Vector index: trained {n_lists} IVF lists over {size} vectors")
+        finally:
+            with self._lock:
+                self._training_dirty = None
+            self._train_lock.release()
+
+    # ----- persistence -----
+
+    def save(self):
+        if not self.directory:
+            return
+        with self._lock:
+            # Copy under the lock, write outside it
+            vectors = self._matrix[:self._size].copy()
+            meta = {"dim": self.dim, "ids": list(self._ids)}
+            version = self._version
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path = os.path.join(self.directory, "vectors.f32")
+        ids_path = os.path.join(self.directory, "ids.json")
+        # Write to temp files then rename so a crash never leaves a torn snapshot
+        vectors.tofile(vectors_path + ".tmp")
+        with open(ids_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(ids_path + ".tmp", ids_path)
+        self._saved_version = version
+        logger.info(f"Vector index saved: {len(meta['ids'])} vectors")
+
+    async def asave(self):
+        await self.executor.run(self.save)
+
+    def start_snapshots(self, interval: float):
+        """Snapshot every `interval` seconds while there are unsaved writes (call from the event loop)"""
+        if self.directory and interval > 0 and self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop(interval))
+
+    async def _snapshot_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            if self._version == self._saved_version:
+                continue
+            try:
+                await self.asave()
+            except Exception as e:
+                logger.error(f"Vector index snapshot failed: {e}")
+
+    async def stop(self):
+        """Stop periodic snapshots, write a final one and release the executor"""
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+        await self.asave()
+        self.executor.shutdown()
+
+    def load(self):
+        ids_path = os.path.join(self.directory, "ids.json")
+        vectors_path = os.path.join(self.directory, "vectors.f32")
+        if not (os.path.exists(ids_path) and os.path.exists(vectors_path)):
+            return
+        try:
+            with open(ids_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            ids = meta["ids"]
+            if not ids:
+                return
+            dim = int(meta["dim"])
+            mapped = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(len(ids), dim))
+            with self._lock:
+                self.dim = dim
+                self._matrix = np.empty((0, dim), dtype=np.float32)
+                self._size = 0
+                self._ensure_capacity(len(ids))
+                self._matrix[:len(ids)] = mapped
+                self._ids = list(ids)
+                self._rows = {user_id: row for row, user_id in enumerate(ids)}
+                self._size = len(ids)
+                self._centroids = None
+                self._trained_size = 0
+                self._version = self._saved_version = 0
+            logger.info(f"Vector index loaded: {self._size} vectors (dim={dim})")
+        except Exception as e:
+            logger.error(f"Vector index snapshot unreadable, starting empty: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": self._size,
+                "dim": self.dim,
+                "capacity": int(self._matrix.shape[0]),
+                "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+                "ivf_threshold": self.ivf_threshold,
+                "nprobe": self.nprobe,
+                "training": self._train_lock.locked(),
+                "unsaved_writes": self._version != self._saved_version,
+            }
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -73,4 +73,37 @@ def batch_cosine_similarity(embeddings1: np.ndarray, embeddings2: np.ndarray) ->
         return similarities
     except Exception as e:
         logger.error(f"Error in batch similarity calculation: {e}")
-        return np.zeros((embeddings1.shape[0], embeddings2.shape[0]))
\ No newline at end of file
+        return np.zeros((embeddings1.shape[0], embeddings2.shape[0]))
+
+def encode_embedding(vec: np.ndarray, dtype: str = "float32") -> Tuple[bytes, Optional[float]]:
+    """
+    Pack an embedding into little-endian bytes for the wire
+    
+    Args:
+        vec: Embedding vector
+        dtype: "float32" (4 B/dim), "float16" (2 B/dim) or "int8" (1 B/dim, symmetric scalar quantization)
+        
+    Returns:
+        (payload, scale) - scale is only set for int8; value = int8 * scale
+    """
+    vec = np.asarray(vec, dtype=np.float32).ravel()
+    if dtype == "float32":
+        return vec.astype('<f4').tobytes(), None
+    if dtype == "float16":
+        return vec.astype('<f2').tobytes(), None
+    if dtype == "int8":
+        max_abs = float(np.max(np.abs(vec))) if vec.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        quantized = np.clip(np.rint(vec / scale), -127, 127).astype(np.int8)
+        return quantized.tobytes(), scale
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+def decode_embedding(payload: bytes, dtype: str = "float32", scale: Optional[float] = None) -> np.ndarray:
+    """Inverse of encode_embedding - always returns float32"""
+    if dtype == "float32":
+        return np.frombuffer(payload, dtype='<f4').astype(np.float32)
+    if dtype == "float16":
+        return np.frombuffer(payload, dtype='<f2').astype(np.float32)
+    if dtype == "int8":
+        return np.frombuffer(payload, dtype=np.int8).astype(np.float32) * np.float32(scale or 1.0)
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")